@@ -0,0 +1,97 @@
+from enum import Enum
+from itertools import chain
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import models
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+class GradeGroup(str, Enum):
+    section = "section"
+    course = "course"
+    dept = "dept"
+
+_GROUP_COLUMNS = {
+    GradeGroup.section: models.Grade.section_id,
+    GradeGroup.course: models.Section.course_code,
+    GradeGroup.dept: models.Course.dept_code,
+}
+
+# Pull (group key, grade) pairs with a Core select and pack them straight into
+# NumPy arrays; no ORM objects are built. Rows without a group get key -1.
+def load_grades(db: Session, group: GradeGroup, year: int = None, semester: str = None, key: int = None):
+    group_column = _GROUP_COLUMNS[group]
+    stmt = (
+        select(func.coalesce(group_column, -1), models.Grade.grade)
+        .select_from(models.Grade)
+        .where(models.Grade.grade.isnot(None))
+    )
+    if group != GradeGroup.section or year is not None or semester is not None:
+        stmt = stmt.join(models.Section, models.Section.id == models.Grade.section_id)
+    if group == GradeGroup.dept:
+        stmt = stmt.outerjoin(models.Course, models.Course.code == models.Section.course_code)
+    if year is not None:
+        stmt = stmt.where(models.Section.year == year)
+    if semester is not None:
+        stmt = stmt.where(models.Section.semester == semester)
+    if key is not None:
+        stmt = stmt.where(group_column == key)
+    rows = db.execute(stmt).all()
+    pairs = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=2 * len(rows)).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+# Per-group count, mean, population standard deviation, min/max, percentiles
+# and a histogram over shared bin edges, computed without a Python loop over
+# rows or groups: one sort, then segment reductions over the sorted runs.
+def grade_statistics(keys, grades, bins: int = 10):
+    if len(grades) == 0:
+        return {"bin_edges": [], "groups": []}
+    keys = np.asarray(keys, dtype=np.int64)
+    grades = np.asarray(grades)
+    if np.issubdtype(grades.dtype, np.integer):
+        # Integer grades: sort on one packed (key, grade) integer, several times
+        # faster than a two-key lexsort
+        key_base = keys.min()
+        grade_base = grades.min()
+        span = int(grades.max()) - int(grade_base) + 1
+        order = np.argsort((keys - key_base) * span + (grades - grade_base))
+    else:
+        order = np.lexsort((grades, keys))
+    keys = keys[order]
+    grades = grades[order].astype(np.float64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    counts = np.diff(np.append(starts, len(keys)))
+    group_ids = np.repeat(np.arange(len(starts)), counts)
+
+    means = np.add.reduceat(grades, starts) / counts
+    stds = np.sqrt(np.add.reduceat((grades - means[group_ids]) ** 2, starts) / counts)
+    lows = grades[starts]
+    highs = grades[starts + counts - 1]
+
+    # Linear interpolation between closest ranks, like np.percentile
+    percentiles = {}
+    for q in PERCENTILES:
+        rank = (counts - 1) * (q / 100)
+        below = np.floor(rank).astype(np.int64)
+        above = np.minimum(below + 1, counts - 1)
+        weight = rank - below
+        percentiles[q] = grades[starts + below] * (1 - weight) + grades[starts + above] * weight
+
+    edges = np.linspace(grades.min(), grades.max(), bins + 1)
+    bin_ids = np.clip(np.searchsorted(edges, grades, side="right") - 1, 0, bins - 1)
+    histograms = np.bincount(group_ids * bins + bin_ids, minlength=len(starts) * bins).reshape(len(starts), bins)
+
+    groups = []
+    for i, start in enumerate(starts):
+        groups.append({
+            "key": int(keys[start]),
+            "count": int(counts[i]),
+            "mean": float(means[i]),
+            "std": float(stds[i]),
+            "min": float(lows[i]),
+            "max": float(highs[i]),
+            "percentiles": {f"p{q}": float(values[i]) for q, values in percentiles.items()},
+            "histogram": histograms[i].tolist(),
+        })
+    return {"bin_edges": edges.tolist(), "groups": groups}
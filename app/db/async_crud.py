@@ -0,0 +1,93 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.cache import reference_cache
+from app.utils.pagination import paginate
+from . import crud, models
+
+# Async counterparts of the read-heavy crud functions. Reads are native
+# AsyncSession queries; the registration writes reuse the sync crud logic
+# through run_sync, which runs it on the same async connection.
+
+# Student CRUD operations
+async def get_students(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None, options=()):
+    return (await db.scalars(paginate(select(models.Student).options(*options), models.Student, skip=skip, limit=limit, cursor=cursor, sort=sort))).all()
+
+async def get_student(db: AsyncSession, student_id: int, options=()):
+    return await db.get(models.Student, student_id, options=options)
+
+# Course CRUD operations
+# Courses share the sync functions' reference cache
+async def get_courses(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    async def load():
+        rows = await db.scalars(paginate(select(models.Course), models.Course, skip=skip, limit=limit, cursor=cursor, sort=sort))
+        return [crud._detached(row) for row in rows]
+    return await reference_cache.read_through_async(models.Course, ("page", skip, limit, cursor, sort), load)
+
+async def get_course(db: AsyncSession, course_code: int):
+    async def load():
+        return crud._detached(await db.get(models.Course, course_code))
+    return await reference_cache.read_through_async(models.Course, ("row", course_code), load)
+
+# Section CRUD operations
+async def get_sections(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None, options=()):
+    return (await db.scalars(paginate(select(models.Section).options(*options), models.Section, skip=skip, limit=limit, cursor=cursor, sort=sort))).all()
+
+async def get_section(db: AsyncSession, section_id: int, options=()):
+    return await db.get(models.Section, section_id, options=options)
+
+async def get_available_courses(db: AsyncSession, semester: str, year: int, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None, options=()):
+    stmt = select(models.Section).options(*options).where(models.Section.semester == semester, models.Section.year == year)
+    if options:
+        return (await db.scalars(paginate(stmt, models.Section, skip=skip, limit=limit, cursor=cursor, sort=sort))).all()
+
+    async def load():
+        rows = await db.scalars(paginate(stmt, models.Section, skip=skip, limit=limit, cursor=cursor, sort=sort))
+        return [crud._detached(row) for row in rows]
+    return await reference_cache.read_through_async(models.Section, ("available", semester, year, skip, limit, cursor, sort), load)
+
+# Grades and transcripts
+async def get_grades_by_student_and_semester(db: AsyncSession, student_id: int, semester: str, year: int):
+    stmt = (
+        select(
+            models.Grade.id,
+            models.Grade.student_id,
+            models.Grade.section_id,
+            models.Grade.grade,
+            models.Section.year,
+            models.Section.semester,
+            models.Course.code.label("course_code"),
+            models.Course.name.label("course_name"),
+            models.Course.credit,
+        )
+        .join(models.Section, models.Section.id == models.Grade.section_id)
+        .outerjoin(models.Course, models.Course.code == models.Section.course_code)
+        .where(
+            models.Grade.student_id == student_id,
+            models.Section.semester == semester,
+            models.Section.year == year,
+        )
+    )
+    return (await db.execute(stmt)).all()
+
+async def get_term_gpas(db: AsyncSession, student_id: int):
+    stmt = (
+        select(models.TermGpa)
+        .where(models.TermGpa.student_id == student_id)
+        .order_by(models.TermGpa.year, models.TermGpa.semester)
+    )
+    return (await db.scalars(stmt)).all()
+
+# Registration and waitlists
+async def drop_course_selection(db: AsyncSession, student_id: int, section_id: int):
+    return await db.run_sync(crud.drop_course_selection, student_id, section_id)
+
+async def get_waitlist_position(db: AsyncSession, student_id: int, section_id: int):
+    stmt = (
+        select(models.Waitlist.seq - models.Section.waitlist_head)
+        .join(models.Section, models.Section.id == models.Waitlist.section_id)
+        .where(models.Waitlist.section_id == section_id, models.Waitlist.student_id == student_id)
+    )
+    return await db.scalar(stmt)
+
+async def withdraw_from_waitlist(db: AsyncSession, student_id: int, section_id: int):
+    return await db.run_sync(crud.withdraw_from_waitlist, student_id, section_id)
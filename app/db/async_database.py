@@ -0,0 +1,45 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from config import get_settings
+from .database import RoutingSession, apply_sqlite_profile
+from .pool import engine_options
+
+settings = get_settings()
+
+# Async driver used for each sync backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "mysql": "aiomysql"}
+
+# Swap the driver of a sync URL for its async counterpart
+def to_async_url(url: str):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}'")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+ASYNC_DATABASE_URL = settings.async_database_url or to_async_url(settings.database_url)
+
+# Create the async SQLAlchemy engine
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, settings, is_async=True))
+
+# Async read replica engines, empty when no replicas are configured
+async_replica_engines = [
+    create_async_engine(to_async_url(url), **engine_options(to_async_url(url), settings, is_async=True))
+    for url in settings.database_replica_urls
+]
+apply_sqlite_profile(async_engine.sync_engine, settings)
+for replica in async_replica_engines:
+    apply_sqlite_profile(replica.sync_engine, settings)
+
+# Same replica routing as the sync sessions, over the async engines
+class AsyncRoutingSession(RoutingSession):
+    primary = async_engine.sync_engine
+    replicas = [replica.sync_engine for replica in async_replica_engines]
+
+# Objects stay usable after commit; lazy loads are not available on AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, sync_session_class=AsyncRoutingSession)
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,23 +1,110 @@
+from collections import defaultdict
+from datetime import date
+from sqlalchemy import bindparam, delete, func, insert, inspect, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from . import models, schemas
 from passlib.context import CryptContext
+from app.utils import versioning
+from app.utils.cache import reference_cache
+from app.utils.pagination import paginate
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Single-round-trip writes. Where the backend has INSERT/UPDATE ... RETURNING
+# (SQLite >= 3.35, MariaDB) the written row comes back with the statement
+# itself. MySQL falls back to the sent values plus the generated key for
+# inserts, and to a SELECT by primary key after updates. Rows are returned
+# as detached objects, so the commit that follows has nothing to expire.
+def _row_object(mapper, row):
+    return mapper.class_(**{attr.key: row.get(attr.columns[0].key) for attr in mapper.column_attrs})
+
+# Copy of a loaded row that belongs to no session, safe to share through
+# the reference cache
+def _detached(obj):
+    if obj is None:
+        return None
+    mapper = inspect(obj).mapper
+    return mapper.class_(**{attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+
+def _column_values(mapper, values):
+    return {mapper.attrs[key].columns[0].key: value for key, value in values.items()}
+
+def _insert_returning(db: Session, model, values: dict):
+    mapper = inspect(model)
+    table = mapper.local_table
+    stmt = insert(table).values(_column_values(mapper, values))
+    if db.get_bind().dialect.insert_returning:
+        return _row_object(mapper, db.execute(stmt.returning(*table.c)).one()._mapping)
+    result = db.execute(stmt)
+    # Sent values include the Python-side column defaults
+    row = dict(result.last_inserted_params())
+    row.update(zip((column.key for column in mapper.primary_key), result.inserted_primary_key))
+    return _row_object(mapper, row)
+
+# Returns None when no row has the key. With nothing to change it only reads.
+# Versioned models get their version bumped by every update; given the
+# versions from If-Match, the update only applies while the row still has
+# one of them, and raises VersionConflict otherwise. No lock is taken.
+def _update_returning(db: Session, model, key, values: dict, versions=None):
+    mapper = inspect(model)
+    table = mapper.local_table
+    where = mapper.primary_key[0] == key
+    matches = []
+    if "version" in mapper.columns and versions is not None:
+        matches.append(mapper.columns.version.in_(versions))
+    if values:
+        if "version" in mapper.columns:
+            values = {**values, "version": mapper.columns.version + 1}
+        stmt = update(table).where(where, *matches).values(_column_values(mapper, values))
+        if db.get_bind().dialect.update_returning:
+            row = db.execute(stmt.returning(*table.c)).first()
+        elif db.execute(stmt).rowcount:
+            row = db.execute(select(*table.c).where(where)).first()
+        else:
+            row = None
+    else:
+        row = db.execute(select(*table.c).where(where, *matches)).first()
+    if row:
+        return _row_object(mapper, row._mapping)
+    # Nothing matched: either there is no such row, or its version moved on
+    if matches and db.execute(select(mapper.primary_key[0]).where(where)).first() is not None:
+        raise versioning.VersionConflict(f"{model.__name__} {key} was changed by another request")
+    return None
+
+# Dependent rows go with the deleted one through the foreign keys' ON DELETE
+# actions, so nothing is loaded. Returns the removed row, or None.
+def _delete_returning(db: Session, model, *criteria):
+    mapper = inspect(model)
+    table = mapper.local_table
+    stmt = delete(table).where(*criteria)
+    if db.get_bind().dialect.delete_returning:
+        row = db.execute(stmt.returning(*table.c)).first()
+        return _row_object(mapper, row._mapping) if row else None
+    row = db.execute(select(*table.c).where(*criteria)).first()
+    if row is None:
+        return None
+    db.execute(stmt)
+    return _row_object(mapper, row._mapping)
+
+# update_* replace every field (PUT); patch_* write only the given values
+# (PATCH, built from exclude_unset), so a field can be cleared or set to 0
+
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
+def get_user_by_username(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
 def create_user(db: Session, user: schemas.UserCreate):
     hashed_password = pwd_context.hash(user.password)
-    db_user = models.User(
-        username=user.username, email=user.email, hashed_password=hashed_password, role="student"
-    )
-    db.add(db_user)
+    db_user = _insert_returning(db, models.User, {
+        "username": user.username, "email": user.email, "hashed_password": hashed_password, "role": "student"
+    })
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 def authenticate_user(db: Session, email: str, password: str):
@@ -29,515 +116,862 @@ def authenticate_user(db: Session, email: str, password: str):
     return user
 
 # Book CRUD operations
-def get_books(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Book).offset(skip).limit(limit).all()
+def get_books(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.Book), models.Book, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
 def get_book(db: Session, book_id: int):
     return db.query(models.Book).filter(models.Book.id == book_id).first()
 
-def create_book(db: Session, book: models.Book):
-    db.add(book)
+def create_book(db: Session, book: schemas.BookCreate):
+    db_book = _insert_returning(db, models.Book, book.dict())
     db.commit()
-    db.refresh(book)
-    return book
+    return db_book
 
-def update_book(db: Session, book_id: int, title: str = None, author: str = None, pub_date: str = None, l_code: int = None):
-    book = get_book(db, book_id)
-    if book:
-        if title:
-            book.title = title
-        if author:
-            book.author = author
-        if pub_date:
-            book.pub_date = pub_date
-        if l_code:
-            book.l_code = l_code
-        db.commit()
-        db.refresh(book)
+def update_book(db: Session, book_id: int, book_update: schemas.BookUpdate):
+    return patch_book(db, book_id, book_update.dict())
+
+def patch_book(db: Session, book_id: int, values: dict):
+    book = _update_returning(db, models.Book, book_id, values)
+    db.commit()
     return book
 
 def delete_book(db: Session, book_id: int):
-    book = get_book(db, book_id)
-    if book:
-        db.delete(book)
-        db.commit()
+    book = _delete_returning(db, models.Book, models.Book.id == book_id)
+    db.commit()
     return book
 
 # Borrow CRUD operations
-def get_borrows(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Borrow).offset(skip).limit(limit).all()
+def get_borrows(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.Borrow), models.Borrow, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
-def create_borrow(db: Session, borrow: models.Borrow):
-    db.add(borrow)
+def get_borrow(db: Session, borrow_id: int):
+    return db.query(models.Borrow).filter(models.Borrow.id == borrow_id).first()
+
+def create_borrow(db: Session, borrow: schemas.BorrowCreate):
+    db_borrow = _insert_returning(db, models.Borrow, borrow.dict())
     db.commit()
-    db.refresh(borrow)
-    return borrow
+    return db_borrow
+
+def update_borrow(db: Session, borrow_id: int, borrow_update: schemas.BorrowUpdate, versions=None):
+    return patch_borrow(db, borrow_id, borrow_update.dict(), versions)
 
-def update_borrow(db: Session, borrow_id: int, date_of_borrow: str = None, return_time: str = None):
-    borrow = db.query(models.Borrow).filter(models.Borrow.id == borrow_id).first()
-    if borrow:
-        if date_of_borrow:
-            borrow.date_of_borrow = date_of_borrow
-        if return_time:
-            borrow.return_time = return_time
-        db.commit()
-        db.refresh(borrow)
+def patch_borrow(db: Session, borrow_id: int, values: dict, versions=None):
+    borrow = _update_returning(db, models.Borrow, borrow_id, values, versions)
+    db.commit()
     return borrow
 
 def delete_borrow(db: Session, borrow_id: int):
-    borrow = db.query(models.Borrow).filter(models.Borrow.id == borrow_id).first()
-    if borrow:
-        db.delete(borrow)
-        db.commit()
+    borrow = _delete_returning(db, models.Borrow, models.Borrow.id == borrow_id)
+    db.commit()
     return borrow
 
 # College CRUD operations
-def get_colleges(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.College).offset(skip).limit(limit).all()
+def get_colleges(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return reference_cache.read_through(models.College, ("page", skip, limit, cursor, sort), lambda: [
+        _detached(row) for row in paginate(db.query(models.College), models.College, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    ])
 
 def get_college(db: Session, college_id: int):
-    return db.query(models.College).filter(models.College.id == college_id).first()
+    return reference_cache.read_through(models.College, ("row", college_id), lambda: _detached(
+        db.query(models.College).filter(models.College.id == college_id).first()
+    ))
 
-def create_college(db: Session, college: models.College):
-    db.add(college)
+def create_college(db: Session, college: schemas.CollegeCreate):
+    db_college = _insert_returning(db, models.College, college.dict())
     db.commit()
-    db.refresh(college)
-    return college
+    reference_cache.invalidate(models.College)
+    return db_college
 
-def update_college(db: Session, college_id: int, name: str = None, office: int = None, phone: str = None, dean: int = None, apikey: str = None):
-    college = get_college(db, college_id)
-    if college:
-        if name:
-            college.name = name
-        if office:
-            college.office = office
-        if phone:
-            college.phone = phone
-        if dean:
-            college.dean = dean
-        if apikey:
-            college.apikey = apikey
-        db.commit()
-        db.refresh(college)
+def update_college(db: Session, college_id: int, college_update: schemas.CollegeUpdate):
+    return patch_college(db, college_id, college_update.dict())
+
+def patch_college(db: Session, college_id: int, values: dict):
+    college = _update_returning(db, models.College, college_id, values)
+    db.commit()
+    reference_cache.invalidate(models.College)
     return college
 
 def delete_college(db: Session, college_id: int):
-    college = get_college(db, college_id)
-    if college:
-        db.delete(college)
-        db.commit()
+    college = _delete_returning(db, models.College, models.College.id == college_id)
+    db.commit()
+    reference_cache.invalidate(models.College)
     return college
 
 # CollegeDept CRUD operations
-def get_college_depts(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.CollegeDept).offset(skip).limit(limit).all()
+def get_college_depts(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.CollegeDept), models.CollegeDept, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
-def create_college_dept(db: Session, college_dept: models.CollegeDept):
-    db.add(college_dept)
+def create_college_dept(db: Session, college_id: int, dept_code: int):
+    college_dept = _insert_returning(db, models.CollegeDept, {"college_id": college_id, "dept_code": dept_code})
     db.commit()
-    db.refresh(college_dept)
     return college_dept
 
 def delete_college_dept(db: Session, college_id: int, dept_code: int):
-    college_dept = db.query(models.CollegeDept).filter(models.CollegeDept.college_id == college_id, models.CollegeDept.dept_code == dept_code).first()
-    if college_dept:
-        db.delete(college_dept)
-        db.commit()
+    college_dept = _delete_returning(db, models.CollegeDept, models.CollegeDept.college_id == college_id, models.CollegeDept.dept_code == dept_code)
+    db.commit()
     return college_dept
 
 # Course CRUD operations
-def get_courses(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Course).offset(skip).limit(limit).all()
+def get_courses(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return reference_cache.read_through(models.Course, ("page", skip, limit, cursor, sort), lambda: [
+        _detached(row) for row in paginate(db.query(models.Course), models.Course, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    ])
 
 def get_course(db: Session, course_code: int):
-    return db.query(models.Course).filter(models.Course.code == course_code).first()
+    return reference_cache.read_through(models.Course, ("row", course_code), lambda: _detached(
+        db.query(models.Course).filter(models.Course.code == course_code).first()
+    ))
 
-def create_course(db: Session, course: models.Course):
-    db.add(course)
+def create_course(db: Session, course: schemas.CourseCreate):
+    db_course = _insert_returning(db, models.Course, course.dict())
     db.commit()
-    db.refresh(course)
-    return course
+    reference_cache.invalidate(models.Course)
+    return db_course
+
+def update_course(db: Session, course_code: int, course_update: schemas.CourseUpdate):
+    return patch_course(db, course_code, course_update.dict())
 
-def update_course(db: Session, course_code: int, name: str = None, level: str = None, description: str = None, dept_code: int = None, credit: int = None):
-    course = get_course(db, course_code)
-    if course:
-        if name:
-            course.name = name
-        if level:
-            course.level = level
-        if description:
-            course.description = description
-        if dept_code:
-            course.dept_code = dept_code
-        if credit:
-            course.credit = credit
-        db.commit()
-        db.refresh(course)
+def patch_course(db: Session, course_code: int, values: dict):
+    course = _update_returning(db, models.Course, course_code, values)
+    db.commit()
+    reference_cache.invalidate(models.Course)
     return course
 
 def delete_course(db: Session, course_code: int):
-    course = get_course(db, course_code)
-    if course:
-        db.delete(course)
-        db.commit()
+    _drop_section_grades(db, models.Section.course_code == course_code)
+    course = _delete_returning(db, models.Course, models.Course.code == course_code)
+    db.commit()
+    reference_cache.invalidate(models.Course)
     return course
 
 # Delete CRUD operations
-def get_deletes(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Delete).offset(skip).limit(limit).all()
-
-def create_delete(db: Session, delete: models.Delete):
-    db.add(delete)
+def get_deletes(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.Delete), models.Delete, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
+
+# Recording a drop also removes the student from the roster and promotes
+# the next waitlisted student, all in the same transaction
+def create_delete(db: Session, delete: schemas.DeleteCreate):
+    db_delete = _insert_returning(db, models.Delete, delete.dict())
+    _release_seat(db, delete.student_id, delete.section_id)
     db.commit()
-    db.refresh(delete)
-    return delete
+    return db_delete
 
 def delete_delete(db: Session, delete_id: int):
-    delete = db.query(models.Delete).filter(models.Delete.id == delete_id).first()
-    if delete:
-        db.delete(delete)
-        db.commit()
+    delete = _delete_returning(db, models.Delete, models.Delete.id == delete_id)
+    db.commit()
     return delete
 
 # Dept CRUD operations
-def get_depts(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Dept).offset(skip).limit(limit).all()
+# Expanded reads (loader options) go to the database; plain rows are cached
+def get_depts(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None, options=()):
+    if options:
+        return paginate(db.query(models.Dept).options(*options), models.Dept, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
+    return reference_cache.read_through(models.Dept, ("page", skip, limit, cursor, sort), lambda: [
+        _detached(row) for row in paginate(db.query(models.Dept), models.Dept, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    ])
+
+def get_dept(db: Session, dept_code: int, options=()):
+    if options:
+        return db.query(models.Dept).options(*options).filter(models.Dept.code == dept_code).first()
+    return reference_cache.read_through(models.Dept, ("row", dept_code), lambda: _detached(
+        db.query(models.Dept).filter(models.Dept.code == dept_code).first()
+    ))
+
+def create_dept(db: Session, dept: schemas.DeptCreate):
+    db_dept = _insert_returning(db, models.Dept, dept.dict())
+    db.commit()
+    reference_cache.invalidate(models.Dept)
+    return db_dept
 
-def get_dept(db: Session, dept_code: int):
-    return db.query(models.Dept).filter(models.Dept.code == dept_code).first()
+def update_dept(db: Session, dept_code: int, dept_update: schemas.DeptUpdate):
+    return patch_dept(db, dept_code, dept_update.dict())
 
-def create_dept(db: Session, dept: models.Dept):
-    db.add(dept)
+def patch_dept(db: Session, dept_code: int, values: dict):
+    dept = _update_returning(db, models.Dept, dept_code, values)
     db.commit()
-    db.refresh(dept)
-    return dept
-
-def update_dept(db: Session, dept_code: int, name: str = None, office: int = None, phone: str = None, college_id: int = None):
-    dept = get_dept(db, dept_code)
-    if dept:
-        if name:
-            dept.name = name
-        if office:
-            dept.office = office
-        if phone:
-            dept.phone = phone
-        if college_id:
-            dept.college_id = college_id
-        db.commit()
-        db.refresh(dept)
+    reference_cache.invalidate(models.Dept)
     return dept
 
 def delete_dept(db: Session, dept_code: int):
-    dept = get_dept(db, dept_code)
-    if dept:
-        db.delete(dept)
-        db.commit()
+    dept = _delete_returning(db, models.Dept, models.Dept.code == dept_code)
+    db.commit()
+    reference_cache.invalidate(models.Dept)
     return dept
 
 # EducationalEmployee CRUD operations
-def get_educational_employees(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.EducationalEmployee).offset(skip).limit(limit).all()
+def get_educational_employees(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.EducationalEmployee), models.EducationalEmployee, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
 def get_educational_employee(db: Session, edu_id: int):
     return db.query(models.EducationalEmployee).filter(models.EducationalEmployee.id == edu_id).first()
 
-def create_educational_employee(db: Session, educational_employee: models.EducationalEmployee):
-    db.add(educational_employee)
+def create_educational_employee(db: Session, educational_employee: schemas.EducationalEmployeeCreate):
+    db_educational_employee = _insert_returning(db, models.EducationalEmployee, educational_employee.dict())
     db.commit()
-    db.refresh(educational_employee)
-    return educational_employee
+    return db_educational_employee
+
+def update_educational_employee(db: Session, edu_id: int, educational_employee_update: schemas.EducationalEmployeeUpdate):
+    return patch_educational_employee(db, edu_id, educational_employee_update.dict())
 
-def update_educational_employee(db: Session, edu_id: int, degree: int = None, apikey: str = None):
-    educational_employee = get_educational_employee(db, edu_id)
-    if educational_employee:
-        if degree:
-            educational_employee.degree = degree
-        if apikey:
-            educational_employee.apikey = apikey
-        db.commit()
-        db.refresh(educational_employee)
+def patch_educational_employee(db: Session, edu_id: int, values: dict):
+    educational_employee = _update_returning(db, models.EducationalEmployee, edu_id, values)
+    db.commit()
     return educational_employee
 
 def delete_educational_employee(db: Session, edu_id: int):
-    educational_employee = get_educational_employee(db, edu_id)
-    if educational_employee:
-        db.delete(educational_employee)
-        db.commit()
+    educational_employee = _delete_returning(db, models.EducationalEmployee, models.EducationalEmployee.id == edu_id)
+    db.commit()
     return educational_employee
 
 # Employee CRUD operations
-def get_employees(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Employee).offset(skip).limit(limit).all()
+def get_employees(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.Employee), models.Employee, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
 def get_employee(db: Session, employee_id: int):
     return db.query(models.Employee).filter(models.Employee.id == employee_id).first()
 
-def create_employee(db: Session, employee: models.Employee):
-    db.add(employee)
+def create_employee(db: Session, employee: schemas.EmployeeCreate):
+    db_employee = _insert_returning(db, models.Employee, employee.dict())
     db.commit()
-    db.refresh(employee)
-    return employee
+    return db_employee
+
+def update_employee(db: Session, employee_id: int, employee_update: schemas.EmployeeUpdate):
+    return patch_employee(db, employee_id, employee_update.dict())
 
-def update_employee(db: Session, employee_id: int, first_name: str = None, last_name: str = None, position: str = None, salary: int = None, department_id: int = None):
-    employee = get_employee(db, employee_id)
-    if employee:
-        if first_name:
-            employee.first_name = first_name
-        if last_name:
-            employee.last_name = last_name
-        if position:
-            employee.position = position
-        if salary:
-            employee.salary = salary
-        if department_id:
-            employee.department_id = department_id
-        db.commit()
-        db.refresh(employee)
+def patch_employee(db: Session, employee_id: int, values: dict):
+    employee = _update_returning(db, models.Employee, employee_id, values)
+    db.commit()
     return employee
 
 def delete_employee(db: Session, employee_id: int):
-    employee = get_employee(db, employee_id)
-    if employee:
-        db.delete(employee)
-        db.commit()
+    employee = _delete_returning(db, models.Employee, models.Employee.id == employee_id)
+    db.commit()
     return employee
 
 # Enroll CRUD operations
-def get_enrolls(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Enroll).offset(skip).limit(limit).all()
+def get_enrolls(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.Enroll), models.Enroll, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
-def create_enroll(db: Session, enroll: models.Enroll):
-    db.add(enroll)
+def create_enroll(db: Session, student_id: int, course_code: int, date_enrolled: date = None):
+    enroll = _insert_returning(db, models.Enroll, {"student_id": student_id, "course_code": course_code, "date_enrolled": date_enrolled})
     db.commit()
-    db.refresh(enroll)
     return enroll
 
 def delete_enroll(db: Session, enroll_id: int):
-    enroll = db.query(models.Enroll).filter(models.Enroll.id == enroll_id).first()
-    if enroll:
-        db.delete(enroll)
-        db.commit()
+    enroll = _delete_returning(db, models.Enroll, models.Enroll.id == enroll_id)
+    db.commit()
     return enroll
 
 # Grade CRUD operations
-def get_grades(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Grade).offset(skip).limit(limit).all()
+def get_grades(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.Grade), models.Grade, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
 def get_grade(db: Session, grade_id: int):
     return db.query(models.Grade).filter(models.Grade.id == grade_id).first()
 
-def create_grade(db: Session, grade: models.Grade):
-    db.add(grade)
+def create_grade(db: Session, grade: schemas.GradeCreate):
+    db_grade = _insert_returning(db, models.Grade, grade.dict())
+    _update_term_gpa(db, grade.student_id, grade.section_id, None, grade.grade)
+    db.commit()
+    return db_grade
+
+def update_grade(db: Session, grade_id: int, grade_update: schemas.GradeUpdate):
+    return patch_grade(db, grade_id, grade_update.dict())
+
+# The term GPA needs the old row, so this is the one patch that reads first.
+# Moving a grade takes it off the old term's totals and onto the new one.
+def patch_grade(db: Session, grade_id: int, values: dict):
+    old = db.execute(
+        select(models.Grade.student_id, models.Grade.section_id, models.Grade.grade).where(models.Grade.id == grade_id)
+    ).first()
+    if old is None:
+        return None
+    new = {**old._mapping, **values}
+    if (new["student_id"], new["section_id"]) == (old.student_id, old.section_id):
+        _update_term_gpa(db, old.student_id, old.section_id, old.grade, new["grade"])
+    else:
+        _update_term_gpa(db, old.student_id, old.section_id, old.grade, None)
+        _update_term_gpa(db, new["student_id"], new["section_id"], None, new["grade"])
+    grade = _update_returning(db, models.Grade, grade_id, values)
     db.commit()
-    db.refresh(grade)
-    return grade
-
-def update_grade(db: Session, grade_id: int, grade_value: int):
-    grade = get_grade(db, grade_id)
-    if grade:
-        grade.grade = grade_value
-        db.commit()
-        db.refresh(grade)
     return grade
 
 def delete_grade(db: Session, grade_id: int):
-    grade = get_grade(db, grade_id)
+    grade = _delete_returning(db, models.Grade, models.Grade.id == grade_id)
     if grade:
-        db.delete(grade)
-        db.commit()
+        _update_term_gpa(db, grade.student_id, grade.section_id, grade.grade, None)
+    db.commit()
     return grade
 
+# Term GPA maintenance. A grade counts its course credits towards the term
+# of its section; grade points are grade * credit.
+def _add_term_totals(db: Session, student_id: int, year: int, semester: str, credits: int, points: int):
+    term = (
+        models.TermGpa.student_id == student_id,
+        models.TermGpa.year == year,
+        models.TermGpa.semester == semester,
+    )
+    values = dict(
+        credits_attempted=models.TermGpa.credits_attempted + credits,
+        grade_points=models.TermGpa.grade_points + points,
+    )
+    if db.execute(update(models.TermGpa).where(*term).values(**values).execution_options(synchronize_session=False)).rowcount:
+        if credits < 0:
+            # The term lost its last graded course
+            db.execute(delete(models.TermGpa).where(*term, models.TermGpa.credits_attempted == 0).execution_options(synchronize_session=False))
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(models.TermGpa).values(student_id=student_id, year=year, semester=semester, credits_attempted=credits, grade_points=points))
+    except IntegrityError:
+        # Someone else created the term row first
+        db.execute(update(models.TermGpa).where(*term).values(**values).execution_options(synchronize_session=False))
+
+# Apply the change of one grade from old_value to new_value (None = no grade)
+def _update_term_gpa(db: Session, student_id: int, section_id: int, old_value, new_value):
+    if old_value == new_value or student_id is None or section_id is None:
+        return
+    term = (
+        db.query(models.Section.year, models.Section.semester, models.Course.credit)
+        .outerjoin(models.Course, models.Course.code == models.Section.course_code)
+        .filter(models.Section.id == section_id)
+        .first()
+    )
+    if term is None or not term.credit:
+        return
+    credits = (new_value is not None) - (old_value is not None)
+    points = (new_value or 0) - (old_value or 0)
+    _add_term_totals(db, student_id, term.year, term.semester, credits * term.credit, points * term.credit)
+
+# Submit a whole section's grades at once. Roster membership and existing
+# grades are read in one query, then all rows are written with one
+# executemany per statement (update, insert, term GPA) in a single
+# transaction. Returns None when the section does not exist, else one
+# result per entry.
+def submit_section_grades(db: Session, section_id: int, entries):
+    term = (
+        db.query(models.Section.year, models.Section.semester, models.Course.credit)
+        .outerjoin(models.Course, models.Course.code == models.Section.course_code)
+        .filter(models.Section.id == section_id)
+        .first()
+    )
+    if term is None:
+        return None
+    student_ids = {entry.student_id for entry in entries}
+    rows = (
+        db.query(models.StudentSection.student_id, models.Grade.id, models.Grade.grade)
+        .outerjoin(
+            models.Grade,
+            (models.Grade.student_id == models.StudentSection.student_id) & (models.Grade.section_id == models.StudentSection.section_id),
+        )
+        .filter(models.StudentSection.section_id == section_id, models.StudentSection.student_id.in_(student_ids))
+        .order_by(models.Grade.id)
+        .all()
+    )
+    # Latest grade row per enrolled student (None when not graded yet)
+    enrolled = {}
+    for student_id, grade_id, grade in rows:
+        enrolled[student_id] = (grade_id, grade) if grade_id is not None else None
+
+    results = []
+    updates = []
+    inserts = []
+    deltas = {}
+    seen = set()
+    for entry in entries:
+        if entry.student_id in seen:
+            results.append({"student_id": entry.student_id, "status": "rejected", "detail": "Duplicate entry for student"})
+            continue
+        seen.add(entry.student_id)
+        if entry.student_id not in enrolled:
+            results.append({"student_id": entry.student_id, "status": "rejected", "detail": "Student is not registered for this section"})
+            continue
+        existing = enrolled[entry.student_id]
+        if existing is None:
+            inserts.append({"student_id": entry.student_id, "section_id": section_id, "grade": entry.grade})
+            results.append({"student_id": entry.student_id, "status": "inserted"})
+            old_value = None
+        else:
+            grade_id, old_value = existing
+            updates.append({"id": grade_id, "grade": entry.grade})
+            results.append({"student_id": entry.student_id, "status": "updated", "grade_id": grade_id})
+        if term.credit:
+            credits = term.credit * (1 - (old_value is not None))
+            points = term.credit * (entry.grade - (old_value or 0))
+            if credits or points:
+                deltas[entry.student_id] = (credits, points)
+
+    if updates:
+        db.execute(update(models.Grade), updates)
+    if inserts:
+        stmt = insert(models.Grade)
+        if db.get_bind().dialect.insert_executemany_returning:
+            new_ids = dict(db.execute(stmt.returning(models.Grade.student_id, models.Grade.id), inserts).all())
+            for result in results:
+                if result["status"] == "inserted":
+                    result["grade_id"] = new_ids.get(result["student_id"])
+        else:
+            db.execute(stmt, inserts)
+    if deltas:
+        _add_term_totals_many(db, term.year, term.semester, deltas)
+    db.commit()
+    return results
+
+# Batched form of _add_term_totals for many students of the same term
+def _add_term_totals_many(db: Session, year: int, semester: str, deltas):
+    table = models.TermGpa.__table__
+    present = {
+        student_id
+        for (student_id,) in db.query(models.TermGpa.student_id).filter(
+            models.TermGpa.student_id.in_(deltas.keys()),
+            models.TermGpa.year == year,
+            models.TermGpa.semester == semester,
+        )
+    }
+    existing = [
+        {"b_sid": student_id, "b_credits": credits, "b_points": points}
+        for student_id, (credits, points) in deltas.items() if student_id in present
+    ]
+    missing = [
+        {"student_id": student_id, "year": year, "semester": semester, "credits_attempted": credits, "grade_points": points}
+        for student_id, (credits, points) in deltas.items() if student_id not in present
+    ]
+    if existing:
+        db.execute(
+            table.update()
+            .where(table.c.SId == bindparam("b_sid"), table.c.Year == year, table.c.Semester == semester)
+            .values(CreditsAttempted=table.c.CreditsAttempted + bindparam("b_credits"), GradePoints=table.c.GradePoints + bindparam("b_points")),
+            existing,
+        )
+    if missing:
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.TermGpa), missing)
+        except IntegrityError:
+            # Someone else created some of the term rows first; add to those
+            for row in missing:
+                _add_term_totals(db, row["student_id"], year, semester, row["credits_attempted"], row["grade_points"])
+
+# Credits and grade points per (student, year, semester), summed over grades
+def _term_totals(*criteria):
+    return (
+        select(
+            models.Grade.student_id,
+            models.Section.year,
+            models.Section.semester,
+            func.sum(models.Course.credit),
+            func.sum(models.Grade.grade * models.Course.credit),
+        )
+        .join(models.Section, models.Section.id == models.Grade.section_id)
+        .join(models.Course, models.Course.code == models.Section.course_code)
+        .where(models.Grade.grade.isnot(None), models.Course.credit.isnot(None), models.Grade.student_id.isnot(None), *criteria)
+        .group_by(models.Grade.student_id, models.Section.year, models.Section.semester)
+    )
+
+# Recompute term GPA rows from the grades, for one student or everyone.
+# Used for backfills and after bulk changes that bypass the grade CRUD.
+def rebuild_term_gpas(db: Session, student_id: int = None):
+    totals = _term_totals()
+    stale = delete(models.TermGpa)
+    if student_id is not None:
+        totals = totals.where(models.Grade.student_id == student_id)
+        stale = stale.where(models.TermGpa.student_id == student_id)
+    db.execute(stale)
+    rows = db.execute(
+        insert(models.TermGpa).from_select(
+            ["SId", "Year", "Semester", "CreditsAttempted", "GradePoints"], totals
+        )
+    ).rowcount
+    db.commit()
+    return rows
+
+# Sections matching the criteria are about to be deleted, and their grades
+# with them through the cascade: take those grades off the term totals first,
+# one batch per term
+def _drop_section_grades(db: Session, *criteria):
+    terms = defaultdict(dict)
+    for student_id, year, semester, credits, points in db.execute(_term_totals(*criteria)):
+        terms[year, semester][student_id] = (-credits, -points)
+    for (year, semester), deltas in terms.items():
+        _add_term_totals_many(db, year, semester, deltas)
+    if terms:
+        students = {student_id for deltas in terms.values() for student_id in deltas}
+        # Terms that lost their last graded course
+        db.execute(delete(models.TermGpa).where(models.TermGpa.student_id.in_(students), models.TermGpa.credits_attempted == 0))
+
+# A student's transcript: every term row, found by primary-key prefix
+def get_term_gpas(db: Session, student_id: int):
+    return (
+        db.query(models.TermGpa)
+        .filter(models.TermGpa.student_id == student_id)
+        .order_by(models.TermGpa.year, models.TermGpa.semester)
+        .all()
+    )
+
 # Professor CRUD operations
-def get_professors(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Professor).offset(skip).limit(limit).all()
+def get_professors(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.Professor), models.Professor, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
 def get_professor(db: Session, professor_id: int):
     return db.query(models.Professor).filter(models.Professor.id == professor_id).first()
 
-def create_professor(db: Session, professor: models.Professor):
-    db.add(professor)
+def create_professor(db: Session, professor: schemas.ProfessorCreate):
+    db_professor = _insert_returning(db, models.Professor, professor.dict())
     db.commit()
-    db.refresh(professor)
-    return professor
+    return db_professor
 
-def update_professor(db: Session, professor_id: int, first_name: str = None, last_name: str = None, phone: str = None, department_id: int = None):
-    professor = get_professor(db, professor_id)
-    if professor:
-        if first_name:
-            professor.first_name = first_name
-        if last_name:
-            professor.last_name = last_name
-        if phone:
-            professor.phone = phone
-        if department_id:
-            professor.department_id = department_id
-        db.commit()
-        db.refresh(professor)
+def update_professor(db: Session, professor_id: int, professor_update: schemas.ProfessorUpdate):
+    return patch_professor(db, professor_id, professor_update.dict())
+
+def patch_professor(db: Session, professor_id: int, values: dict):
+    professor = _update_returning(db, models.Professor, professor_id, values)
+    db.commit()
     return professor
 
 def delete_professor(db: Session, professor_id: int):
-    professor = get_professor(db, professor_id)
-    if professor:
-        db.delete(professor)
-        db.commit()
+    _drop_section_grades(db, models.Section.professor_id == professor_id)
+    professor = _delete_returning(db, models.Professor, models.Professor.id == professor_id)
+    db.commit()
+    reference_cache.invalidate(models.Professor)  # its sections went with it
     return professor
 
 # Room CRUD operations
-def get_rooms(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Room).offset(skip).limit(limit).all()
+def get_rooms(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return reference_cache.read_through(models.Room, ("page", skip, limit, cursor, sort), lambda: [
+        _detached(row) for row in paginate(db.query(models.Room), models.Room, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    ])
 
 def get_room(db: Session, room_code: int):
-    return db.query(models.Room).filter(models.Room.code == room_code).first()
+    return reference_cache.read_through(models.Room, ("row", room_code), lambda: _detached(
+        db.query(models.Room).filter(models.Room.code == room_code).first()
+    ))
 
-def create_room(db: Session, room: models.Room):
-    db.add(room)
+def create_room(db: Session, room: schemas.RoomCreate):
+    db_room = _insert_returning(db, models.Room, room.dict())
     db.commit()
-    db.refresh(room)
-    return room
+    reference_cache.invalidate(models.Room)
+    return db_room
+
+def update_room(db: Session, room_code: int, room_update: schemas.RoomUpdate):
+    return patch_room(db, room_code, room_update.dict())
 
-def update_room(db: Session, room_code: int, location: str = None, capacity: int = None):
-    room = get_room(db, room_code)
-    if room:
-        if location:
-            room.location = location
-        if capacity:
-            room.capacity = capacity
-        db.commit()
-        db.refresh(room)
+def patch_room(db: Session, room_code: int, values: dict):
+    room = _update_returning(db, models.Room, room_code, values)
+    db.commit()
+    reference_cache.invalidate(models.Room)
     return room
 
 def delete_room(db: Session, room_code: int):
-    room = get_room(db, room_code)
-    if room:
-        db.delete(room)
-        db.commit()
+    _drop_section_grades(db, models.Section.room_code == room_code)
+    room = _delete_returning(db, models.Room, models.Room.code == room_code)
+    db.commit()
+    reference_cache.invalidate(models.Room)
     return room
 
 # Section CRUD operations
-def get_sections(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Section).offset(skip).limit(limit).all()
+def get_sections(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None, options=()):
+    return paginate(db.query(models.Section).options(*options), models.Section, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
-def get_section(db: Session, section_id: int):
-    return db.query(models.Section).filter(models.Section.id == section_id).first()
+def get_section(db: Session, section_id: int, options=()):
+    return db.query(models.Section).options(*options).filter(models.Section.id == section_id).first()
 
-def create_section(db: Session, section: models.Section):
-    db.add(section)
+def create_section(db: Session, section: schemas.SectionCreate):
+    db_section = _insert_returning(db, models.Section, section.dict())
     db.commit()
-    db.refresh(section)
-    return section
+    reference_cache.invalidate(models.Section)
+    return db_section
+
+def update_section(db: Session, section_id: int, section_update: schemas.SectionUpdate, versions=None):
+    return patch_section(db, section_id, section_update.dict(), versions)
 
-def update_section(db: Session, section_id: int, year: int = None, semester: str = None, room_code: int = None, course_code: int = None, professor_id: int = None):
-    section = get_section(db, section_id)
-    if section:
-        if year:
-            section.year = year
-        if semester:
-            section.semester = semester
-        if room_code:
-            section.room_code = room_code
-        if course_code:
-            section.course_code = course_code
-        if professor_id:
-            section.professor_id = professor_id
-        db.commit()
-        db.refresh(section)
+def patch_section(db: Session, section_id: int, values: dict, versions=None):
+    section = _update_returning(db, models.Section, section_id, values, versions)
+    db.commit()
+    reference_cache.invalidate(models.Section)
     return section
 
 def delete_section(db: Session, section_id: int):
-    section = get_section(db, section_id)
-    if section:
-        db.delete(section)
-        db.commit()
+    _drop_section_grades(db, models.Section.id == section_id)
+    section = _delete_returning(db, models.Section, models.Section.id == section_id)
+    db.commit()
+    reference_cache.invalidate(models.Section)
     return section
 
 # Student CRUD operations
-def get_students(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Student).offset(skip).limit(limit).all()
+def get_students(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None, options=()):
+    return paginate(db.query(models.Student).options(*options), models.Student, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
-def get_student(db: Session, student_id: int):
-    return db.query(models.Student).filter(models.Student.id == student_id).first()
+def get_student(db: Session, student_id: int, options=()):
+    return db.query(models.Student).options(*options).filter(models.Student.id == student_id).first()
 
-def create_student(db: Session, student: models.Student):
-    db.add(student)
+def create_student(db: Session, student: schemas.StudentCreate):
+    db_student = _insert_returning(db, models.Student, student.dict())
     db.commit()
-    db.refresh(student)
-    return student
+    return db_student
 
-def update_student(db: Session, student_id: int, first_name: str = None, last_name: str = None, phone: str = None, address: str = None, dept_code: int = None):
-    student = get_student(db, student_id)
-    if student:
-        if first_name:
-            student.first_name = first_name
-        if last_name:
-            student.last_name = last_name
-        if phone:
-            student.phone = phone
-        if address:
-            student.address = address
-        if dept_code:
-            student.dept_code = dept_code
-        db.commit()
-        db.refresh(student)
+def update_student(db: Session, student_id: int, student_update: schemas.StudentUpdate, versions=None):
+    return patch_student(db, student_id, student_update.dict(), versions)
+
+def patch_student(db: Session, student_id: int, values: dict, versions=None):
+    student = _update_returning(db, models.Student, student_id, values, versions)
+    db.commit()
     return student
 
+# The student's rosters and waitlist entries cascade away with the row; their
+# sections get the seats and waitlist places back. Term GPA rows cascade too.
 def delete_student(db: Session, student_id: int):
-    student = get_student(db, student_id)
+    sections = db.scalars(select(models.StudentSection.section_id).where(models.StudentSection.student_id == student_id)).all()
+    waiting = db.execute(select(models.Waitlist.section_id, models.Waitlist.seq).where(models.Waitlist.student_id == student_id)).all()
+    student = _delete_returning(db, models.Student, models.Student.id == student_id)
     if student:
-        db.delete(student)
-        db.commit()
+        for section_id, seq in waiting:
+            _close_waitlist_gap(db, section_id, seq)
+        for section_id in sections:
+            _return_seat(db, section_id)
+            _promote_next(db, section_id)
+    db.commit()
     return student
 
 # Takes CRUD operations
-def get_takes(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Takes).offset(skip).limit(limit).all()
+def get_takes(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None):
+    return paginate(db.query(models.Takes), models.Takes, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
 def get_take(db: Session, take_id: int):
     return db.query(models.Takes).filter(models.Takes.id == take_id).first()
 
-def create_take(db: Session, take: models.Takes):
-    db.add(take)
+def create_take(db: Session, take: schemas.TakesCreate):
+    db_take = _insert_returning(db, models.Takes, take.dict())
     db.commit()
-    db.refresh(take)
-    return take
+    return db_take
+
+def update_take(db: Session, take_id: int, take_update: schemas.TakesUpdate):
+    return patch_take(db, take_id, take_update.dict())
 
-def update_take(db: Session, take_id: int, student_id: int = None, course_code: int = None, year: int = None, semester: str = None):
-    take = get_take(db, take_id)
-    if take:
-        if student_id:
-            take.student_id = student_id
-        if course_code:
-            take.course_code = course_code
-        if year:
-            take.year = year
-        if semester:
-            take.semester = semester
-        db.commit()
-        db.refresh(take)
+def patch_take(db: Session, take_id: int, values: dict):
+    take = _update_returning(db, models.Takes, take_id, values)
+    db.commit()
     return take
 
 def delete_take(db: Session, take_id: int):
-    take = get_take(db, take_id)
-    if take:
-        db.delete(take)
-        db.commit()
+    take = _delete_returning(db, models.Takes, models.Takes.id == take_id)
+    db.commit()
     return take
 
 # Get available courses for the next semester
-def get_available_courses(db: Session, semester: str, year: int, skip: int = 0, limit: int = 10):
-    return db.query(models.Section).filter(models.Section.semester == semester, models.Section.year == year).offset(skip).limit(limit).all()
+# Plain pages are cached like the reference data. Registrations only move
+# the seat and waitlist counters, which the page doesn't show, so only
+# section edits (and deletes cascading into sections) invalidate it.
+def get_available_courses(db: Session, semester: str, year: int, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = None, options=()):
+    query = db.query(models.Section).options(*options).filter(models.Section.semester == semester, models.Section.year == year)
+    if options:
+        return paginate(query, models.Section, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
+    return reference_cache.read_through(models.Section, ("available", semester, year, skip, limit, cursor, sort), lambda: [
+        _detached(row) for row in paginate(query, models.Section, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    ])
+
+# Outcomes of register_course_selection
+REGISTERED = "registered"
+SECTION_FULL = "full"
+ALREADY_REGISTERED = "already_registered"
+WAITLISTED = "waitlisted"
+ALREADY_WAITLISTED = "already_waitlisted"
+
+# Claim one seat with a conditional UPDATE on the section's counter. The
+# capacity check and the increment happen in the same statement, so two
+# concurrent registrations can never both take the last seat. Sections
+# without a room (or a room without a capacity) are unlimited.
+def _claim_seat(db: Session, section_id: int):
+    capacity = (
+        select(models.Room.capacity)
+        .where(models.Room.code == models.Section.room_code)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(models.Section)
+        .where(models.Section.id == section_id, or_(capacity.is_(None), models.Section.seats_taken < capacity))
+        .values(seats_taken=models.Section.seats_taken + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+# Give back a seat claimed by _claim_seat
+def _return_seat(db: Session, section_id: int):
+    db.execute(
+        update(models.Section)
+        .where(models.Section.id == section_id)
+        .values(seats_taken=models.Section.seats_taken - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+# Register one student inside the caller's transaction. The seat claim and
+# the roster insert run in a savepoint, so a duplicate registration only
+# undoes itself (and gives its seat back), not the rest of a batch. Runs in
+# constant time: the roster is never loaded. Returns None when the section
+# or student does not exist. With waitlist=True a full section puts the
+# student on its waitlist instead.
+def _register(db: Session, student_id: int, section_id: int, waitlist: bool = False):
+    if db.query(models.Student.id).filter(models.Student.id == student_id).first() is None:
+        return None
+    try:
+        with db.begin_nested():
+            claimed = _claim_seat(db, section_id)
+            if claimed:
+                db.execute(insert(models.StudentSection).values(student_id=student_id, section_id=section_id))
+    except IntegrityError:
+        return ALREADY_REGISTERED
+    if claimed:
+        return REGISTERED
+    if db.query(models.Section.id).filter(models.Section.id == section_id).first() is None:
+        return None
+    if db.get(models.StudentSection, (student_id, section_id)) is not None:
+        return ALREADY_REGISTERED
+    if waitlist:
+        return _join_waitlist(db, student_id, section_id)
+    return SECTION_FULL
 
 # Register course selection for a student
-def register_course_selection(db: Session, student_id: int, section_id: int):
-    section = db.query(models.Section).filter(models.Section.id == section_id).first()
-    if section is None:
+def register_course_selection(db: Session, student_id: int, section_id: int, waitlist: bool = False):
+    result = _register(db, student_id, section_id, waitlist)
+    db.commit()
+    return result
+
+# Register a batch of (student_id, section_id, waitlist) tuples in one
+# transaction, returning one outcome per tuple in order
+def register_course_selections(db: Session, registrations):
+    results = [_register(db, student_id, section_id, waitlist) for student_id, section_id, waitlist in registrations]
+    db.commit()
+    return results
+
+# Waitlist operations. Entries are numbered from the section's tail counter
+# and promoted from its head counter, so joining, promoting and looking up a
+# position are all index seeks, independent of the waitlist length.
+def _join_waitlist(db: Session, student_id: int, section_id: int):
+    try:
+        with db.begin_nested():
+            db.execute(
+                update(models.Section)
+                .where(models.Section.id == section_id)
+                .values(waitlist_tail=models.Section.waitlist_tail + 1)
+                .execution_options(synchronize_session=False)
+            )
+            seq = db.query(models.Section.waitlist_tail).filter(models.Section.id == section_id).scalar()
+            db.execute(insert(models.Waitlist).values(section_id=section_id, student_id=student_id, seq=seq, date_joined=date.today()))
+    except IntegrityError:
+        return ALREADY_WAITLISTED
+    return WAITLISTED
+
+def get_waitlist_position(db: Session, student_id: int, section_id: int):
+    return (
+        db.query(models.Waitlist.seq - models.Section.waitlist_head)
+        .join(models.Section, models.Section.id == models.Waitlist.section_id)
+        .filter(models.Waitlist.section_id == section_id, models.Waitlist.student_id == student_id)
+        .scalar()
+    )
+
+# Leaving the waitlist closes the gap behind the student. This is the only
+# operation that touches more than one entry, and it is the rare one.
+def withdraw_from_waitlist(db: Session, student_id: int, section_id: int):
+    entry = db.get(models.Waitlist, (section_id, student_id))
+    if entry is None:
         return None
-    section.students.append(db.query(models.Student).filter(models.Student.id == student_id).first())
+    db.delete(entry)
+    db.flush()
+    _close_waitlist_gap(db, section_id, entry.seq)
     db.commit()
-    return section
+    return entry
+
+def _close_waitlist_gap(db: Session, section_id: int, seq: int):
+    db.execute(
+        update(models.Waitlist)
+        .where(models.Waitlist.section_id == section_id, models.Waitlist.seq > seq)
+        .values(seq=models.Waitlist.seq - 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(models.Section)
+        .where(models.Section.id == section_id)
+        .values(waitlist_tail=models.Section.waitlist_tail - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+# Move the head of the waitlist onto the roster if a seat is free. Returns
+# the promoted student id, or None when nobody could be promoted. The head
+# entry is read with a locking read, and a concurrent drop that promoted it
+# first shows up as a DELETE that removed nothing: the seat goes back and
+# the new head is read, so each entry moves the head counter exactly once.
+def _promote_next(db: Session, section_id: int):
+    while True:
+        entry = (
+            db.query(models.Waitlist.student_id)
+            .filter(models.Waitlist.section_id == section_id)
+            .order_by(models.Waitlist.seq)
+            .with_for_update()
+            .first()
+        )
+        if entry is None or not _claim_seat(db, section_id):
+            return None
+        removed = db.execute(
+            delete(models.Waitlist).where(models.Waitlist.section_id == section_id, models.Waitlist.student_id == entry.student_id)
+        ).rowcount
+        if removed != 1:
+            _return_seat(db, section_id)
+            continue
+        db.execute(
+            update(models.Section)
+            .where(models.Section.id == section_id)
+            .values(waitlist_head=models.Section.waitlist_head + 1)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.StudentSection).values(student_id=entry.student_id, section_id=section_id))
+        except IntegrityError:
+            # Already on the roster some other way; skip to the next entry
+            _return_seat(db, section_id)
+            continue
+        return entry.student_id
+
+# Remove a student from a roster inside the caller's transaction, freeing
+# the seat for the next waitlisted student
+def _release_seat(db: Session, student_id: int, section_id: int):
+    removed = db.execute(
+        delete(models.StudentSection)
+        .where(models.StudentSection.student_id == student_id, models.StudentSection.section_id == section_id)
+    ).rowcount
+    if not removed:
+        return False
+    _return_seat(db, section_id)
+    _promote_next(db, section_id)
+    return True
 
+# Drop a course selection. Returns False when the student was not on the roster.
+def drop_course_selection(db: Session, student_id: int, section_id: int):
+    dropped = _release_seat(db, student_id, section_id)
+    db.commit()
+    return dropped
+
+# A student's grades for one term with their course info, in one round trip.
+# The term lives on the section, so this joins grade -> section -> course;
+# grade(SId, SecId) drives the lookup and section is reached by primary key.
 def get_grades_by_student_and_semester(db: Session, student_id: int, semester: str, year: int):
-    return db.query(models.Grade).filter(
-        models.Grade.student_id == student_id,
-        models.Grade.semester == semester,
-        models.Grade.year == year
-    ).all()
+    return (
+        db.query(
+            models.Grade.id,
+            models.Grade.student_id,
+            models.Grade.section_id,
+            models.Grade.grade,
+            models.Section.year,
+            models.Section.semester,
+            models.Course.code.label("course_code"),
+            models.Course.name.label("course_name"),
+            models.Course.credit,
+        )
+        .join(models.Section, models.Section.id == models.Grade.section_id)
+        .outerjoin(models.Course, models.Course.code == models.Section.course_code)
+        .filter(
+            models.Grade.student_id == student_id,
+            models.Section.semester == semester,
+            models.Section.year == year,
+        )
+        .all()
+    )
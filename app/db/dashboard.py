@@ -0,0 +1,95 @@
+import asyncio
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+from . import models
+
+# Everything the student home page shows, as one payload. Each part is one
+# independent statement, so the page costs a fixed five queries whatever the
+# student's history: load() runs them in turn on the request's session,
+# load_async() runs them concurrently, each on its own session and connection.
+
+# Grades shown by default, most recently recorded first
+LATEST_GRADES = 5
+
+# part name: (statement, how to read its result)
+def statements(student_id: int, year: int, semester: str, latest_grades: int = LATEST_GRADES):
+    return {
+        "student": (
+            select(models.Student).where(models.Student.id == student_id),
+            lambda result: result.scalars().first(),
+        ),
+        # The term's sections with course, room and professor joined in
+        "sections": (
+            select(models.Section)
+            .join(models.StudentSection, models.StudentSection.section_id == models.Section.id)
+            .where(models.StudentSection.student_id == student_id, models.Section.year == year, models.Section.semester == semester)
+            .options(joinedload(models.Section.course), joinedload(models.Section.room), joinedload(models.Section.professor))
+            .order_by(models.Section.id),
+            lambda result: result.scalars().all(),
+        ),
+        # Books not returned yet
+        "borrows": (
+            select(models.Borrow)
+            .where(models.Borrow.student_id == student_id, models.Borrow.return_time.is_(None))
+            .order_by(models.Borrow.id),
+            lambda result: result.scalars().all(),
+        ),
+        "latest_grades": (
+            select(
+                models.Grade.id,
+                models.Grade.student_id,
+                models.Grade.section_id,
+                models.Grade.grade,
+                models.Section.year,
+                models.Section.semester,
+                models.Course.code.label("course_code"),
+                models.Course.name.label("course_name"),
+                models.Course.credit,
+            )
+            .join(models.Section, models.Section.id == models.Grade.section_id)
+            .outerjoin(models.Course, models.Course.code == models.Section.course_code)
+            .where(models.Grade.student_id == student_id)
+            .order_by(models.Grade.id.desc())
+            .limit(latest_grades),
+            lambda result: result.all(),
+        ),
+        # Cumulative totals from the materialized term GPA rows
+        "totals": (
+            select(func.sum(models.TermGpa.credits_attempted), func.sum(models.TermGpa.grade_points))
+            .where(models.TermGpa.student_id == student_id),
+            lambda result: result.one(),
+        ),
+    }
+
+def _payload(parts: dict, year: int, semester: str):
+    if parts["student"] is None:
+        return None
+    credits_attempted, grade_points = parts.pop("totals")
+    return {
+        **parts,
+        "year": year,
+        "semester": semester,
+        "credits_attempted": credits_attempted or 0,
+        "grade_points": grade_points or 0,
+        "gpa": round(grade_points / credits_attempted, 2) if credits_attempted else None,
+    }
+
+# Returns None when the student does not exist
+def load(db: Session, student_id: int, year: int, semester: str, latest_grades: int = LATEST_GRADES):
+    parts = {}
+    for name, (stmt, read) in statements(student_id, year, semester, latest_grades).items():
+        parts[name] = read(db.execute(stmt))
+        if name == "student" and parts[name] is None:
+            return None
+    return _payload(parts, year, semester)
+
+async def _load_part(sessionmaker, stmt, read):
+    async with sessionmaker() as db:
+        return read(await db.execute(stmt))
+
+# Same payload with the statements in flight together. An AsyncSession runs
+# one statement at a time, so each part gets a session from `sessionmaker`.
+async def load_async(sessionmaker, student_id: int, year: int, semester: str, latest_grades: int = LATEST_GRADES):
+    parts = statements(student_id, year, semester, latest_grades)
+    values = await asyncio.gather(*(_load_part(sessionmaker, stmt, read) for stmt, read in parts.values()))
+    return _payload(dict(zip(parts, values)), year, semester)
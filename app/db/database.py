@@ -1,9 +1,13 @@
 import os
-from sqlalchemy import create_engine
+import random
+from contextvars import ContextVar
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Delete, Insert, Update
 from dotenv import load_dotenv
 from config import get_settings
+from .pool import engine_options
 # Load environment variables from .env file
 settings=get_settings()
 
@@ -12,17 +16,109 @@ DATABASE_URL = settings.database_url
 if not DATABASE_URL:
     raise ValueError("No DATABASE_URL found in environment variables")
 
+# Pragmas run on every new SQLite connection. foreign_keys is off by default
+# in SQLite, which would silently ignore the ondelete='CASCADE' clauses.
+def sqlite_pragmas(settings):
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA cache_size={settings.sqlite_cache_size}",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}",
+        "PRAGMA foreign_keys=ON",
+    ]
+
+# Statements that don't need a write transaction
+_SQLITE_READS = ("SELECT", "WITH", "PRAGMA", "EXPLAIN")
+
+# Apply the SQLite profile to an engine (sync, or an async engine's
+# sync_engine); other backends are left alone
+def apply_sqlite_profile(engine, settings):
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+        # The driver otherwise starts transactions itself, only before DML,
+        # and never for SAVEPOINT, so begin_nested() would open the outermost
+        # savepoint and its RELEASE would commit. Turn that off; the
+        # transaction is started by write_transaction() below.
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin_transaction(conn):
+        conn.info["sqlite_began"] = False
+
+    # Send BEGIN IMMEDIATE before a transaction's first write (or savepoint).
+    # Reads before it run on their own, as they did with the driver's
+    # handling. A deferred BEGIN would hold a read snapshot that fails to
+    # upgrade to a write with "database is locked" once another connection
+    # has committed, without waiting for busy_timeout; IMMEDIATE takes the
+    # write lock up front and waits for it.
+    @event.listens_for(engine, "before_cursor_execute")
+    def write_transaction(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("sqlite_began", True) or not conn.in_transaction():
+            return
+        if statement.lstrip()[:9].upper().startswith(_SQLITE_READS):
+            return
+        cursor.execute("BEGIN IMMEDIATE")
+        conn.info["sqlite_began"] = True
+
 # Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, settings))
+apply_sqlite_profile(engine, settings)
+
+# Read replica engines, empty when no replicas are configured
+replica_engines = [create_engine(url, **engine_options(url, settings)) for url in settings.database_replica_urls]
+for replica in replica_engines:
+    apply_sqlite_profile(replica, settings)
+
+# Set per request by the routing middleware: True when the request may read
+# from a replica. Outside a request (workers, scripts) everything goes to the
+# primary.
+use_replica = ContextVar("use_replica", default=False)
+
+# Session that sends reads to a replica when the request allows it. Writes,
+# and every statement after the session's first write, go to the primary.
+class RoutingSession(Session):
+    primary = engine
+    replicas = replica_engines
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["wrote"] = True
+        if self.replicas and use_replica.get() and not self.info.get("wrote"):
+            return random.choice(self.replicas)
+        return self.primary
+
+# True when this request's reads go to a replica
+def reading_replica():
+    return bool(replica_engines) and use_replica.get()
+
+# Engine for Core reads outside a session, under the same rules
+def read_engine():
+    if reading_replica():
+        return random.choice(replica_engines)
+    return engine
 
 # Create a configured "Session" class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
 
 # Create a base class for declarative models
 Base = declarative_base()
 
-# Dependency to get DB session
-def get_db():
+# Dependency to get DB session, shared by every router and by nested
+# dependencies such as get_current_user: FastAPI caches it per request, so
+# they all get the same session. The session only checks out a connection
+# when it first runs a statement, and SessionRoute hands it back when the
+# endpoint returns. Being async, entering and leaving this dependency needs
+# no threadpool worker.
+async def get_db():
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,111 @@
+from datetime import date
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from app.utils import pagination
+from . import crud, dashboard, database, models, rosters, schemas
+
+# Index check for the CRUD layer. The keyed CRUD calls below run against a
+# small scratch SQLite database built from the models; every statement they
+# send is then run through EXPLAIN QUERY PLAN, and any full table scan
+# ("SCAN <table>") is reported. Unfiltered list pages are left out: reading
+# the first rows in key order is a scan by design.
+
+# Statements with nothing to plan
+_SKIPPED = ("SAVEPOINT", "RELEASE", "ROLLBACK", "COMMIT", "BEGIN", "PRAGMA")
+
+def _seed(db: Session):
+    # One flush per level: most foreign keys have no relationship() to order them
+    for rows in (
+        [models.College(id=1, name="C", apikey="k"), models.Room(code=1, location="R", capacity=1), models.Book(id=1, title="B", author="A", l_code=1)],
+        [models.Dept(code=1, name="D", college_id=1)],
+        [
+            models.Course(code=1, name="C", level="1", description="-", dept_code=1, credit=3),
+            models.Professor(id=1, first_name="P", last_name="Q", department_id=1),
+            models.Student(id=1, first_name="S", last_name="T", dept_code=1),
+            models.Student(id=2, first_name="S", last_name="T", dept_code=1),
+            models.User(username="u", email="u@example.com", hashed_password="-"),
+        ],
+        [models.Section(id=1, year=2024, semester="fall", room_code=1, course_code=1, professor_id=1)],
+    ):
+        db.add_all(rows)
+        db.flush()
+    db.commit()
+
+# name: CRUD call, in the order they run (later calls see earlier writes)
+CHECKS = [
+    ("get_student", lambda db: crud.get_student(db, 1)),
+    ("get_section", lambda db: crud.get_section(db, 1)),
+    ("get_user_by_username", lambda db: crud.get_user_by_username(db, "u")),
+    ("get_students (cursor page)", lambda db: crud.get_students(db, limit=1, cursor=pagination.encode_cursor([1]))),
+    ("get_available_courses", lambda db: crud.get_available_courses(db, "fall", 2024)),
+    ("register_course_selection", lambda db: crud.register_course_selection(db, 1, 1)),
+    ("register_course_selection (waitlist)", lambda db: crud.register_course_selection(db, 2, 1, waitlist=True)),
+    ("get_waitlist_position", lambda db: crud.get_waitlist_position(db, 2, 1)),
+    ("section_roster", lambda db: db.execute(rosters.section_roster(1)).all()),
+    ("professor_rosters", lambda db: db.execute(rosters.professor_rosters(1, 2024, "fall")).all()),
+    ("create_grade", lambda db: crud.create_grade(db, schemas.GradeCreate(student_id=1, section_id=1, grade=15))),
+    ("patch_grade", lambda db: crud.patch_grade(db, 1, {"grade": 17})),
+    ("get_grades_by_student_and_semester", lambda db: crud.get_grades_by_student_and_semester(db, 1, "fall", 2024)),
+    ("get_term_gpas", lambda db: crud.get_term_gpas(db, 1)),
+    ("student dashboard", lambda db: dashboard.load(db, 1, 2024, "fall")),
+    ("rebuild_term_gpas (one student)", lambda db: crud.rebuild_term_gpas(db, student_id=1)),
+    ("patch_student (If-Match)", lambda db: crud.patch_student(db, 1, {"phone": "1"}, versions=[1])),
+    ("create_borrow", lambda db: crud.create_borrow(db, schemas.BorrowCreate(book_id=1, student_id=1, date_of_borrow=date(2024, 1, 1)))),
+    ("drop_course_selection", lambda db: crud.drop_course_selection(db, 1, 1)),
+    ("withdraw_from_waitlist", lambda db: crud.withdraw_from_waitlist(db, 2, 1)),
+    ("delete_grade", lambda db: crud.delete_grade(db, 1)),
+    ("delete_student", lambda db: crud.delete_student(db, 2)),
+    ("delete_section", lambda db: crud.delete_section(db, 1)),
+    ("delete_room", lambda db: crud.delete_room(db, 1)),
+    ("delete_dept", lambda db: crud.delete_dept(db, 1)),
+]
+
+def _full_scans(connection, statement, parameters):
+    if isinstance(parameters, list):
+        parameters = parameters[0] if parameters else ()
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in plan if row[-1].startswith("SCAN ") and row[-1] != "SCAN CONSTANT ROW"]
+
+# Foreign keys with an ON DELETE action whose column does not lead any index:
+# the cascade (or SET NULL) would scan the child table for every delete.
+# Checked on the schema, so deletes the calls above don't make are covered.
+def unindexed_foreign_keys(metadata=models.Base.metadata):
+    problems = []
+    for table in metadata.sorted_tables:
+        leading = {index.columns[0].name for index in table.indexes}
+        leading.add(list(table.primary_key.columns)[0].name)
+        for fk in table.foreign_keys:
+            if fk.ondelete and fk.parent.name not in leading:
+                problems.append(f"{table.name}.{fk.parent.name} -> {fk.target_fullname} (ON DELETE {fk.ondelete}) has no index")
+    return problems
+
+# Returns a list of problems; empty when every query uses an index
+def check():
+    engine = create_engine("sqlite://")
+    database.apply_sqlite_profile(engine, database.settings)
+    models.Base.metadata.create_all(engine)
+    problems = unindexed_foreign_keys()
+    sent = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        sent.append((statement, parameters))
+
+    with Session(engine) as db:
+        _seed(db)
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            for name, call in CHECKS:
+                sent.clear()
+                call(db)
+                statements = list(sent)
+                sent.clear()
+                connection = db.connection()
+                for statement, parameters in statements:
+                    if statement.lstrip().upper().startswith(_SKIPPED):
+                        continue
+                    for scan in _full_scans(connection, statement, parameters):
+                        problems.append(f"{name}: {scan} in {' '.join(statement.split())}")
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+    engine.dispose()
+    return problems
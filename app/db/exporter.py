@@ -0,0 +1,32 @@
+from sqlalchemy import inspect, select
+from . import models
+
+# Exportable entities; names match the importer where both exist
+ENTITIES = {
+    "books": models.Book,
+    "borrows": models.Borrow,
+    "colleges": models.College,
+    "courses": models.Course,
+    "deletes": models.Delete,
+    "depts": models.Dept,
+    "educational_employees": models.EducationalEmployee,
+    "employees": models.Employee,
+    "enrollments": models.StudentSection,
+    "grades": models.Grade,
+    "professors": models.Professor,
+    "rooms": models.Room,
+    "sections": models.Section,
+    "students": models.Student,
+    "takes": models.Takes,
+    "term_gpas": models.TermGpa,
+    "waitlists": models.Waitlist,
+}
+
+# Attribute names (the API field names, not the column names) and a Core
+# select of those columns in primary key order. Credentials never leave the
+# database through an export.
+def export_statement(entity: str):
+    mapper = inspect(ENTITIES[entity])
+    attributes = [attr for attr in mapper.column_attrs if attr.key not in models.PRIVATE_ATTRIBUTES]
+    stmt = select(*[attr.columns[0].label(attr.key) for attr in attributes]).order_by(*mapper.primary_key)
+    return [attr.key for attr in attributes], stmt
@@ -0,0 +1,233 @@
+import csv
+import json
+import time
+from collections import Counter
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.utils.cache import reference_cache
+from . import models, schemas
+
+FORMATS = ("csv", "ndjson")
+
+# Importable entities: model, validating schema, client-supplied primary key
+# attribute (if any), and the foreign keys checked against in-memory lookups
+ENTITIES = {
+    "students": (models.Student, schemas.StudentCreate, "id", {"dept_code": "dept"}),
+    "courses": (models.Course, schemas.CourseCreate, "code", {"dept_code": "dept"}),
+    "sections": (models.Section, schemas.SectionCreate, "id", {"course_code": "course", "room_code": "room", "professor_id": "professor"}),
+    "enrollments": (models.StudentSection, schemas.StudentSectionCreate, None, {"student_id": "student", "section_id": "section"}),
+}
+
+_LOOKUP_COLUMNS = {
+    "dept": models.Dept.code,
+    "course": models.Course.code,
+    "room": models.Room.code,
+    "professor": models.Professor.id,
+    "student": models.Student.id,
+    "section": models.Section.id,
+}
+
+# Lookup holding each entity's own keys, to reject rows that already exist
+_OWN_LOOKUP = {"students": "student", "courses": "course", "sections": "section"}
+
+class ImportFailed(ValueError):
+    pass
+
+# Stands in for a row with bytes that are not UTF-8
+UNDECODABLE = object()
+
+# Decode a binary stream a line at a time, so bytes that are not UTF-8 only
+# spoil their own line: it is decoded with replacement characters and its
+# number is added to bad_lines. A leading byte order mark (Excel adds one to
+# CSV exports) is skipped.
+def _decoded_lines(stream, bad_lines):
+    for line_no, raw in enumerate(stream, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeDecodeError:
+            bad_lines.add(line_no)
+            yield raw.decode("utf-8", errors="replace")
+
+# Yield (line number, row dict) from a binary stream without reading it all
+def read_rows(stream, format: str):
+    bad_lines = set()
+    lines = _decoded_lines(stream, bad_lines)
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        first_line = 1
+        for row in reader:
+            # A quoted value can span lines; the row is bad if any of them is
+            if bad_lines.intersection(range(first_line, reader.line_num + 1)):
+                yield reader.line_num, UNDECODABLE
+            else:
+                yield reader.line_num, {key: (value if value != "" else None) for key, value in row.items()}
+            first_line = reader.line_num + 1
+    elif format == "ndjson":
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            if line_no in bad_lines:
+                yield line_no, UNDECODABLE
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_no, None
+                continue
+            yield line_no, row if isinstance(row, dict) else None
+    else:
+        raise ImportFailed(f"Unknown import format '{format}'")
+
+def _validation_detail(error: ValidationError):
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+class _Import:
+    def __init__(self, db: Session, entity: str, chunk_size: int, max_errors: int):
+        if entity not in ENTITIES:
+            raise ImportFailed(f"Unknown import entity '{entity}'")
+        self.db = db
+        self.entity = entity
+        self.model, self.schema, self.key, self.references = ENTITIES[entity]
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.rows = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.errors = []
+        # Built once per import, then kept current as rows are accepted
+        names = set(self.references.values())
+        if entity in _OWN_LOOKUP:
+            names.add(_OWN_LOOKUP[entity])
+        self.lookups = {name: set(db.scalars(select(_LOOKUP_COLUMNS[name]))) for name in names}
+        if entity == "enrollments":
+            self.enrolled = set(db.execute(select(models.StudentSection.student_id, models.StudentSection.section_id)).tuples())
+            # Seats left per section, None when unlimited (the capacity rule
+            # of crud._claim_seat: no room or no room capacity)
+            self.seats_left = {
+                section_id: None if capacity is None else capacity - seats_taken
+                for section_id, seats_taken, capacity in db.execute(
+                    select(models.Section.id, models.Section.seats_taken, models.Room.capacity)
+                    .outerjoin(models.Room, models.Room.code == models.Section.room_code)
+                )
+            }
+
+    def reject(self, line_no: int, detail: str):
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line_no, "detail": detail})
+
+    # Validate one row; returns insert values or None when rejected
+    def validate(self, line_no: int, row):
+        if row is UNDECODABLE:
+            self.reject(line_no, "Row is not valid UTF-8")
+            return None
+        if row is None:
+            self.reject(line_no, "Malformed row")
+            return None
+        try:
+            values = self.schema.parse_obj(row).dict()
+        except ValidationError as e:
+            self.reject(line_no, _validation_detail(e))
+            return None
+        for field, lookup in self.references.items():
+            if values[field] is not None and values[field] not in self.lookups[lookup]:
+                self.reject(line_no, f"{field} {values[field]} does not exist")
+                return None
+        if self.key is not None and row.get(self.key) is not None:
+            try:
+                values[self.key] = int(row[self.key])
+            except (TypeError, ValueError):
+                self.reject(line_no, f"{self.key}: value is not a valid integer")
+                return None
+            own = self.lookups[_OWN_LOOKUP[self.entity]]
+            if values[self.key] in own:
+                self.reject(line_no, f"{self.key} {values[self.key]} already exists")
+                return None
+            own.add(values[self.key])
+        if self.entity == "enrollments":
+            pair = (values["student_id"], values["section_id"])
+            if pair in self.enrolled:
+                self.reject(line_no, "Student is already registered for this section")
+                return None
+            left = self.seats_left[values["section_id"]]
+            if left is not None and left <= 0:
+                self.reject(line_no, "Section is full")
+                return None
+            self.enrolled.add(pair)
+            if left is not None:
+                self.seats_left[values["section_id"]] = left - 1
+        return values
+
+    # Write one chunk as a multi-row insert in its own transaction. If the
+    # database still refuses it, fall back to row-by-row inserts in
+    # savepoints so one bad row only rejects itself.
+    def flush(self, chunk):
+        if not chunk:
+            return
+        if self.key is not None:
+            # Rows with explicit keys first, so generated keys can't take them
+            chunk.sort(key=lambda item: item[1].get(self.key) is None)
+        try:
+            self.db.execute(insert(self.model), [values for _, values in chunk])
+            accepted = [values for _, values in chunk]
+        except IntegrityError:
+            self.db.rollback()
+            accepted = []
+            for line_no, values in chunk:
+                try:
+                    with self.db.begin_nested():
+                        self.db.execute(insert(self.model), [values])
+                    accepted.append(values)
+                except IntegrityError as e:
+                    self.reject(line_no, str(e.orig))
+                    if self.entity == "enrollments" and self.seats_left[values["section_id"]] is not None:
+                        self.seats_left[values["section_id"]] += 1
+        if self.entity == "enrollments" and accepted:
+            self.count_seats(accepted)
+        self.db.commit()
+        reference_cache.invalidate(self.model)
+        self.inserted += len(accepted)
+
+    # Keep section seat counters in step with imported enrollments
+    def count_seats(self, accepted):
+        seats = Counter(values["section_id"] for values in accepted)
+        table = models.Section.__table__
+        self.db.execute(
+            table.update()
+            .where(table.c.SecId == bindparam("b_section"))
+            .values(SeatsTaken=table.c.SeatsTaken + bindparam("b_seats")),
+            [{"b_section": section_id, "b_seats": count} for section_id, count in seats.items()],
+        )
+
+    def run(self, rows):
+        started = time.perf_counter()
+        chunk = []
+        for line_no, row in rows:
+            self.rows += 1
+            values = self.validate(line_no, row)
+            if values is None:
+                continue
+            chunk.append((line_no, values))
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk)
+                chunk = []
+        self.flush(chunk)
+        elapsed = time.perf_counter() - started
+        return {
+            "entity": self.entity,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else 0.0,
+            "errors": self.errors,
+        }
+
+# Stream-import CSV or NDJSON rows of one entity. Rows are validated with the
+# entity's Create schema, foreign keys are checked against lookups loaded
+# once up front, and accepted rows are written in chunked transactions.
+def import_stream(db: Session, entity: str, stream, format: str, chunk_size: int = 1000, max_errors: int = 100):
+    job = _Import(db, entity, chunk_size, max_errors)
+    return job.run(read_rows(stream, format))
@@ -0,0 +1,30 @@
+"""Added section seat counter
+
+Revision ID: 1619f8bf535f
+Revises: 06afb2cf2a14
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1619f8bf535f'
+down_revision = '06afb2cf2a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('section', sa.Column('SeatsTaken', sa.Integer(), server_default='0', nullable=False))
+    # Backfill the counter from the existing rosters
+    op.execute(
+        'UPDATE section SET SeatsTaken = '
+        '(SELECT COUNT(*) FROM student_section WHERE student_section.section_id = section.SecId)'
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('section') as batch_op:
+        batch_op.drop_column('SeatsTaken')
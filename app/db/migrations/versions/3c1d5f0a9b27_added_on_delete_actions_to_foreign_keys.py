@@ -0,0 +1,70 @@
+"""Added on delete actions to foreign keys
+
+Revision ID: 3c1d5f0a9b27
+Revises: fcd9dc31beaf
+Create Date: 2026-10-18 16:41:09.302517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1d5f0a9b27'
+down_revision = 'fcd9dc31beaf'
+branch_labels = None
+depends_on = None
+
+# SQLite foreign keys are unnamed; batch mode reflects them under this name
+naming_convention = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+# table: [(column, referred table, referred column, on delete)]
+foreign_keys = {
+    'section': [('RCode', 'room', 'RCode', 'CASCADE'), ('CCode', 'course', 'CCode', 'CASCADE'), ('PId', 'professor', 'PId', 'CASCADE')],
+    'enroll': [('student_id', 'student', 'SId', 'CASCADE'), ('course_code', 'course', 'CCode', 'CASCADE')],
+    'dept': [('CID', 'college', 'CID', 'SET NULL')],
+    'course': [('DCode', 'dept', 'DCode', 'SET NULL')],
+    'employee': [('DCode', 'dept', 'DCode', 'SET NULL')],
+    'professor': [('DCode', 'dept', 'DCode', 'SET NULL')],
+    'student': [('DCode', 'dept', 'DCode', 'SET NULL')],
+}
+
+# Indexes on referencing columns, so each cascade is a seek rather than a scan
+indexes = {
+    'section': ['RCode', 'CCode', 'PId'],
+    'student_section': ['section_id'],
+    'grade': ['SecId'],
+    'delete': ['SId', 'SecId'],
+    'waitlist': ['SId'],
+    'takes': ['CCode'],
+    'borrow': ['book_BId'],
+    'enroll': ['course_code'],
+}
+
+
+# Drop each foreign key (when it exists) and create it again with the given
+# on delete action
+def replace_foreign_keys(with_ondelete: bool) -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, keys in foreign_keys.items():
+        existing = {tuple(fk['constrained_columns']): fk['name'] for fk in inspector.get_foreign_keys(table)}
+        with op.batch_alter_table(table, naming_convention=naming_convention) as batch_op:
+            for column, referred, remote, ondelete in keys:
+                name = naming_convention['fk'] % {'table_name': table, 'column_0_name': column, 'referred_table_name': referred}
+                if (column,) in existing:
+                    batch_op.drop_constraint(existing[(column,)] or name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], [remote], ondelete=ondelete if with_ondelete else None)
+
+
+def upgrade() -> None:
+    replace_foreign_keys(with_ondelete=True)
+    for table, columns in indexes.items():
+        for column in columns:
+            op.create_index(f'ix_{table}_{column}', table, [column], unique=False)
+
+
+def downgrade() -> None:
+    for table, columns in indexes.items():
+        for column in columns:
+            op.drop_index(f'ix_{table}_{column}', table_name=table)
+    replace_foreign_keys(with_ondelete=False)
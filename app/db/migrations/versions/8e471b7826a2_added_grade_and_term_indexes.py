@@ -0,0 +1,26 @@
+"""Added grade and term indexes
+
+Revision ID: 8e471b7826a2
+Revises: ed7ce3529489
+Create Date: 2026-10-18 10:41:09.302115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e471b7826a2'
+down_revision = 'ed7ce3529489'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_grade_SId_SecId', 'grade', ['SId', 'SecId'], unique=False)
+    op.create_index('ix_section_Year_Semester', 'section', ['Year', 'Semester'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_section_Year_Semester', table_name='section')
+    op.drop_index('ix_grade_SId_SecId', table_name='grade')
@@ -0,0 +1,28 @@
+"""Added row versions
+
+Revision ID: a5e2c8d14f60
+Revises: 3c1d5f0a9b27
+Create Date: 2026-10-18 18:07:52.614093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5e2c8d14f60'
+down_revision = '3c1d5f0a9b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('borrow', sa.Column('Version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('section', sa.Column('Version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('student', sa.Column('Version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    for table in ('student', 'section', 'borrow'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('Version')
@@ -0,0 +1,40 @@
+"""Added foreign key and filter indexes
+
+Revision ID: c81f4e9a2d35
+Revises: a5e2c8d14f60
+Create Date: 2026-10-18 19:26:14.880731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f4e9a2d35'
+down_revision = 'a5e2c8d14f60'
+branch_labels = None
+depends_on = None
+
+# grade(SId, SecId), section(Year, Semester), section(PId) and
+# student_section(section_id) already exist from earlier revisions
+indexes = [
+    ('ix_takes_SId_Year_Semester', 'takes', ['SId', 'Year', 'Semester']),
+    ('ix_borrow_student_SId_returnTime', 'borrow', ['student_SId', 'returnTime']),
+    ('ix_enroll_student_id', 'enroll', ['student_id']),
+    ('ix_student_DCode', 'student', ['DCode']),
+    ('ix_professor_DCode', 'professor', ['DCode']),
+    ('ix_employee_DCode', 'employee', ['DCode']),
+    ('ix_course_DCode', 'course', ['DCode']),
+    ('ix_dept_CID', 'dept', ['CID']),
+    ('ix_college_dept_dept_code', 'college_dept', ['dept_code']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in indexes:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, columns in reversed(indexes):
+        op.drop_index(name, table_name=table)
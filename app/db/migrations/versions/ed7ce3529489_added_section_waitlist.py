@@ -0,0 +1,39 @@
+"""Added section waitlist
+
+Revision ID: ed7ce3529489
+Revises: 1619f8bf535f
+Create Date: 2026-10-18 10:03:27.550871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ed7ce3529489'
+down_revision = '1619f8bf535f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('section', sa.Column('WaitlistHead', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('section', sa.Column('WaitlistTail', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('waitlist',
+    sa.Column('SecId', sa.Integer(), nullable=False),
+    sa.Column('SId', sa.Integer(), nullable=False),
+    sa.Column('Seq', sa.Integer(), nullable=False),
+    sa.Column('DateJoined', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['SecId'], ['section.SecId'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['SId'], ['student.SId'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('SecId', 'SId')
+    )
+    op.create_index('ix_waitlist_SecId_Seq', 'waitlist', ['SecId', 'Seq'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_waitlist_SecId_Seq', table_name='waitlist')
+    op.drop_table('waitlist')
+    with op.batch_alter_table('section') as batch_op:
+        batch_op.drop_column('WaitlistTail')
+        batch_op.drop_column('WaitlistHead')
@@ -0,0 +1,40 @@
+"""Added term GPA aggregate
+
+Revision ID: fcd9dc31beaf
+Revises: 8e471b7826a2
+Create Date: 2026-10-18 11:26:52.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fcd9dc31beaf'
+down_revision = '8e471b7826a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('term_gpa',
+    sa.Column('SId', sa.Integer(), nullable=False),
+    sa.Column('Year', sa.Integer(), nullable=False),
+    sa.Column('Semester', sa.String(length=255), nullable=False),
+    sa.Column('CreditsAttempted', sa.Integer(), nullable=False),
+    sa.Column('GradePoints', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['SId'], ['student.SId'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('SId', 'Year', 'Semester')
+    )
+    # Backfill from the existing grades (same query as crud.rebuild_term_gpas)
+    op.execute(
+        'INSERT INTO term_gpa (SId, Year, Semester, CreditsAttempted, GradePoints) '
+        'SELECT grade.SId, section.Year, section.Semester, SUM(course.Credit), SUM(grade.grade * course.Credit) '
+        'FROM grade JOIN section ON section.SecId = grade.SecId JOIN course ON course.CCode = section.CCode '
+        'WHERE grade.grade IS NOT NULL AND course.Credit IS NOT NULL AND grade.SId IS NOT NULL '
+        'GROUP BY grade.SId, section.Year, section.Semester'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('term_gpa')
@@ -1,22 +1,25 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Table, Boolean
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Table, Boolean, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 
+# Credential attributes: never exported, never cached outside the worker
+PRIVATE_ATTRIBUTES = {"apikey", "hashed_password"}
+
 class StudentSection(Base):
     __tablename__ = 'student_section'
     student_id = Column(Integer, ForeignKey('student.SId', ondelete='CASCADE'), primary_key=True)
-    section_id = Column(Integer, ForeignKey('section.SecId', ondelete='CASCADE'), primary_key=True)
+    section_id = Column(Integer, ForeignKey('section.SecId', ondelete='CASCADE'), primary_key=True, index=True)
 
 class CollegeDept(Base):
     __tablename__ = 'college_dept'
     college_id = Column(Integer, ForeignKey('college.CID', ondelete='CASCADE'), primary_key=True)
-    dept_code = Column(Integer, ForeignKey('dept.DCode', ondelete='CASCADE'), primary_key=True)
+    dept_code = Column(Integer, ForeignKey('dept.DCode', ondelete='CASCADE'), primary_key=True, index=True)
 
 class Enroll(Base):
     __tablename__ = 'enroll'
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey('student.SId'))
-    course_code = Column(Integer, ForeignKey('course.CCode'))
+    student_id = Column(Integer, ForeignKey('student.SId', ondelete='CASCADE'), index=True)
+    course_code = Column(Integer, ForeignKey('course.CCode', ondelete='CASCADE'), index=True)
     date_enrolled = Column(Date)
 
 class User(Base):
@@ -36,15 +39,18 @@ class Book(Base):
     pub_date = Column('BPubDate', Date)
     l_code = Column('LCode', Integer)
 
-    borrows = relationship("Borrow", back_populates="book", cascade="all, delete-orphan")
+    borrows = relationship("Borrow", back_populates="book", cascade="all, delete-orphan", passive_deletes=True)
 
 class Borrow(Base):
     __tablename__ = 'borrow'
     id = Column(Integer, primary_key=True, autoincrement=True)
-    book_id = Column('book_BId', Integer, ForeignKey('book.BId', ondelete='CASCADE'))
+    book_id = Column('book_BId', Integer, ForeignKey('book.BId', ondelete='CASCADE'), index=True)
     student_id = Column('student_SId', Integer, ForeignKey('student.SId', ondelete='CASCADE'))
     date_of_borrow = Column('dateOFBorrow', Date)
     return_time = Column('returnTime', Date)
+    version = Column('Version', Integer, nullable=False, default=1, server_default='1')
+
+    __table_args__ = (Index('ix_borrow_student_SId_returnTime', 'student_SId', 'returnTime'),)
 
     book = relationship("Book", back_populates="borrows")
     student = relationship("Student", back_populates="borrows")
@@ -58,7 +64,7 @@ class College(Base):
     dean = Column('CDean', Integer)
     apikey = Column('apikey', String(255), nullable=False)
 
-    depts = relationship('Dept', secondary='college_dept', back_populates='colleges')
+    depts = relationship('Dept', secondary='college_dept', back_populates='colleges', passive_deletes=True)
 
 class Course(Base):
     __tablename__ = 'course'
@@ -66,17 +72,17 @@ class Course(Base):
     name = Column('CoName', String(255))
     level = Column('Level', String(255))
     description = Column('CDesc', String(255))
-    dept_code = Column('DCode', Integer, ForeignKey('dept.DCode'))
+    dept_code = Column('DCode', Integer, ForeignKey('dept.DCode', ondelete='SET NULL'), index=True)
     credit = Column('Credit', Integer)
 
-    sections = relationship('Section', back_populates='course', cascade="all, delete-orphan")
-    takes = relationship('Takes', back_populates='course', cascade="all, delete-orphan")
+    sections = relationship('Section', back_populates='course', cascade="all, delete-orphan", passive_deletes=True)
+    takes = relationship('Takes', back_populates='course', cascade="all, delete-orphan", passive_deletes=True)
 
 class Delete(Base):
     __tablename__ = 'delete'
     id = Column(Integer, primary_key=True, autoincrement=True)
-    student_id = Column('SId', Integer, ForeignKey('student.SId', ondelete='CASCADE'))
-    section_id = Column('SecId', Integer, ForeignKey('section.SecId', ondelete='CASCADE'))
+    student_id = Column('SId', Integer, ForeignKey('student.SId', ondelete='CASCADE'), index=True)
+    section_id = Column('SecId', Integer, ForeignKey('section.SecId', ondelete='CASCADE'), index=True)
     type = Column('Type', Integer)
     date_of_deletion = Column('DOD', Date)
 
@@ -86,12 +92,12 @@ class Dept(Base):
     name = Column('DName', String(255))
     office = Column('DOffice', Integer)
     phone = Column('DPhone', String(255))
-    college_id = Column('CID', Integer, ForeignKey('college.CID'))
+    college_id = Column('CID', Integer, ForeignKey('college.CID', ondelete='SET NULL'), index=True)
 
-    colleges = relationship('College', secondary='college_dept', back_populates='depts')
-    professors = relationship('Professor', back_populates='department')
-    employees = relationship('Employee', back_populates='department')
-    students = relationship('Student', back_populates='department')
+    colleges = relationship('College', secondary='college_dept', back_populates='depts', passive_deletes=True)
+    professors = relationship('Professor', back_populates='department', passive_deletes=True)
+    employees = relationship('Employee', back_populates='department', passive_deletes=True)
+    students = relationship('Student', back_populates='department', passive_deletes=True)
 
 class EducationalEmployee(Base):
     __tablename__ = 'educational_employee'
@@ -107,7 +113,7 @@ class Employee(Base):
     last_name = Column('Lname', String(255))
     position = Column('position', String(255))
     salary = Column('salary', Integer)
-    department_id = Column('DCode', Integer, ForeignKey('dept.DCode'))
+    department_id = Column('DCode', Integer, ForeignKey('dept.DCode', ondelete='SET NULL'), index=True)
 
     department = relationship('Dept', back_populates='employees')
 
@@ -115,18 +121,36 @@ class Grade(Base):
     __tablename__ = 'grade'
     id = Column(Integer, primary_key=True, autoincrement=True)
     student_id = Column('SId', Integer, ForeignKey('student.SId', ondelete='CASCADE'))
-    section_id = Column('SecId', Integer, ForeignKey('section.SecId', ondelete='CASCADE'))
+    section_id = Column('SecId', Integer, ForeignKey('section.SecId', ondelete='CASCADE'), index=True)
     grade = Column('grade', Integer)
 
+    __table_args__ = (Index('ix_grade_SId_SecId', 'SId', 'SecId'),)
+
+# Per-student, per-term grade totals, maintained incrementally by the grade
+# CRUD functions so a transcript is a primary-key lookup
+class TermGpa(Base):
+    __tablename__ = 'term_gpa'
+    student_id = Column('SId', Integer, ForeignKey('student.SId', ondelete='CASCADE'), primary_key=True)
+    year = Column('Year', Integer, primary_key=True)
+    semester = Column('Semester', String(255), primary_key=True)
+    credits_attempted = Column('CreditsAttempted', Integer, nullable=False, default=0)
+    grade_points = Column('GradePoints', Integer, nullable=False, default=0)
+
+    @property
+    def gpa(self):
+        if not self.credits_attempted:
+            return None
+        return round(self.grade_points / self.credits_attempted, 2)
+
 class Professor(Base):
     __tablename__ = 'professor'
     id = Column('PId', Integer, primary_key=True, index=True)
     first_name = Column('Fname', String(255))
     last_name = Column('Lname', String(255))
     phone = Column('Phone', String(255))
-    department_id = Column('DCode', Integer, ForeignKey('dept.DCode'))
+    department_id = Column('DCode', Integer, ForeignKey('dept.DCode', ondelete='SET NULL'), index=True)
 
-    sections = relationship('Section', back_populates='professor', cascade="all, delete-orphan")
+    sections = relationship('Section', back_populates='professor', cascade="all, delete-orphan", passive_deletes=True)
     department = relationship('Dept', back_populates='professors')
 
 class Room(Base):
@@ -135,18 +159,27 @@ class Room(Base):
     location = Column('RLocation', String(255))
     capacity = Column('Capacity', Integer)
 
-    sections = relationship('Section', back_populates='room', cascade="all, delete-orphan")
+    sections = relationship('Section', back_populates='room', cascade="all, delete-orphan", passive_deletes=True)
 
 class Section(Base):
     __tablename__ = 'section'
     id = Column('SecId', Integer, primary_key=True, index=True)
     year = Column('Year', Integer)
     semester = Column('Semester', String(255))
-    room_code = Column('RCode', Integer, ForeignKey('room.RCode'))
-    course_code = Column('CCode', Integer, ForeignKey('course.CCode'))
-    professor_id = Column('PId', Integer, ForeignKey('professor.PId'))
-
-    students = relationship('Student', secondary='student_section', back_populates='sections')
+    room_code = Column('RCode', Integer, ForeignKey('room.RCode', ondelete='CASCADE'), index=True)
+    course_code = Column('CCode', Integer, ForeignKey('course.CCode', ondelete='CASCADE'), index=True)
+    professor_id = Column('PId', Integer, ForeignKey('professor.PId', ondelete='CASCADE'), index=True)
+    seats_taken = Column('SeatsTaken', Integer, nullable=False, default=0, server_default='0')
+    # Waitlist sequence numbers already promoted / handed out
+    waitlist_head = Column('WaitlistHead', Integer, nullable=False, default=0, server_default='0')
+    waitlist_tail = Column('WaitlistTail', Integer, nullable=False, default=0, server_default='0')
+    # Bumped by edits through PUT/PATCH only; the seat and waitlist counters
+    # above change with every registration and must not cause conflicts
+    version = Column('Version', Integer, nullable=False, default=1, server_default='1')
+
+    __table_args__ = (Index('ix_section_Year_Semester', 'Year', 'Semester'),)
+
+    students = relationship('Student', secondary='student_section', back_populates='sections', passive_deletes=True)
     room = relationship('Room', back_populates='sections')
     course = relationship('Course', back_populates='sections')
     professor = relationship('Professor', back_populates='sections')
@@ -158,20 +191,34 @@ class Student(Base):
     last_name = Column('Lname', String(255))
     phone = Column('Phone', String(255))
     address = Column('Address', String(255))
-    dept_code = Column('DCode', Integer, ForeignKey('dept.DCode'))
+    dept_code = Column('DCode', Integer, ForeignKey('dept.DCode', ondelete='SET NULL'), index=True)
+    version = Column('Version', Integer, nullable=False, default=1, server_default='1')
 
-    borrows = relationship("Borrow", back_populates="student", cascade="all, delete-orphan")
-    sections = relationship('Section', secondary='student_section', back_populates='students')
-    takes = relationship('Takes', back_populates='student', cascade="all, delete-orphan")
+    borrows = relationship("Borrow", back_populates="student", cascade="all, delete-orphan", passive_deletes=True)
+    sections = relationship('Section', secondary='student_section', back_populates='students', passive_deletes=True)
+    takes = relationship('Takes', back_populates='student', cascade="all, delete-orphan", passive_deletes=True)
     department = relationship('Dept', back_populates='students')
 
+# Active waitlist entries of a section carry the contiguous sequence numbers
+# WaitlistHead + 1 .. WaitlistTail, so a student's position is Seq - WaitlistHead
+class Waitlist(Base):
+    __tablename__ = 'waitlist'
+    section_id = Column('SecId', Integer, ForeignKey('section.SecId', ondelete='CASCADE'), primary_key=True)
+    student_id = Column('SId', Integer, ForeignKey('student.SId', ondelete='CASCADE'), primary_key=True, index=True)
+    seq = Column('Seq', Integer, nullable=False)
+    date_joined = Column('DateJoined', Date)
+
+    __table_args__ = (Index('ix_waitlist_SecId_Seq', 'SecId', 'Seq'),)
+
 class Takes(Base):
     __tablename__ = 'takes'
     id = Column(Integer, primary_key=True, autoincrement=True)
     student_id = Column('SId', Integer, ForeignKey('student.SId', ondelete='CASCADE'))
-    course_code = Column('CCode', Integer, ForeignKey('course.CCode', ondelete='CASCADE'))
+    course_code = Column('CCode', Integer, ForeignKey('course.CCode', ondelete='CASCADE'), index=True)
     year = Column('Year', Integer)
     semester = Column('Semester', String(255))
 
+    __table_args__ = (Index('ix_takes_SId_Year_Semester', 'SId', 'Year', 'Semester'),)
+
     student = relationship('Student', back_populates='takes')
     course = relationship('Course', back_populates='takes')
@@ -0,0 +1,107 @@
+import bisect
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Running checkout wait histogram, shared by a pool and the pools it is
+# recreated into
+class CheckoutMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.buckets[bisect.bisect_left(CHECKOUT_BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            # Cumulative counts per upper bound, Prometheus style
+            cumulative, running = {}, 0
+            for bound, count in zip(CHECKOUT_BUCKETS + ("+Inf",), self.buckets):
+                running += count
+                cumulative[str(bound)] = running
+            return {
+                "count": self.count,
+                "sum_seconds": round(self.total, 6),
+                "max_seconds": round(self.max, 6),
+                "timeouts": self.timeouts,
+                "buckets": cumulative,
+            }
+
+# Queue pools that time every checkout, including waits for a free
+# connection, opening new ones and the pre-ping
+def _timed(base):
+    class TimedPool(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.metrics = CheckoutMetrics()
+
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                connection = super().connect()
+            except exc.TimeoutError:
+                self.metrics.timed_out()
+                raise
+            self.metrics.observe(time.perf_counter() - start)
+            return connection
+
+        def recreate(self):
+            pool = super().recreate()
+            pool.metrics = self.metrics
+            return pool
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+TimedQueuePool = _timed(QueuePool)
+TimedAsyncAdaptedQueuePool = _timed(AsyncAdaptedQueuePool)
+
+# create_engine keyword arguments for the configured pool. In-memory SQLite
+# keeps SQLAlchemy's default single-connection pool.
+def engine_options(url, settings, is_async: bool = False):
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+# Live state of an engine's pool plus its checkout wait histogram
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats["checkout_wait"] = metrics.snapshot()
+    return stats
@@ -0,0 +1,71 @@
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+from app.utils import expand
+from . import crud, database, models, schemas
+
+# Statement budgets for the expanded list endpoints. Each page is read with
+# the CRUD call its route makes, with every expansion the route accepts, and
+# serialized with the route's response schema; every statement either step
+# sends counts against the budget. Related rows are distinct per row, so a
+# relationship that lazy-loads shows up as a count that grows with the page.
+
+PAGE = 20
+
+def _seed(db: Session):
+    keys = range(1, PAGE + 1)
+    db.execute(insert(models.College), [{"id": k, "name": "C", "office": k, "phone": "0", "dean": k, "apikey": f"k{k}"} for k in keys])
+    db.execute(insert(models.Dept), [{"code": k, "name": "D", "office": k, "phone": "0", "college_id": k} for k in keys])
+    db.execute(insert(models.CollegeDept), [{"college_id": k, "dept_code": k} for k in keys])
+    db.execute(insert(models.Room), [{"code": k, "location": "R", "capacity": 1} for k in keys])
+    db.execute(insert(models.Course), [{"code": k, "name": "C", "level": "1", "description": "-", "dept_code": k, "credit": 3} for k in keys])
+    db.execute(insert(models.Professor), [{"id": k, "first_name": "P", "last_name": "Q", "phone": "0", "department_id": k} for k in keys])
+    db.execute(insert(models.Student), [{"id": k, "first_name": "S", "last_name": "T", "phone": "0", "address": "-", "dept_code": k} for k in keys])
+    db.execute(insert(models.Section), [
+        {"id": k, "year": 2024, "semester": "fall", "room_code": k, "course_code": k, "professor_id": k, "seats_taken": 1}
+        for k in keys
+    ])
+    db.execute(insert(models.StudentSection), [{"student_id": k, "section_id": k} for k in keys])
+    db.commit()
+
+# (route, model, response schema, page read, statement budget). The budget is
+# one SELECT for the page (many-to-one expansions are joined into it) plus one
+# per expanded collection.
+ENDPOINTS = [
+    ("GET /sections/", models.Section, schemas.SectionExpandedOut, lambda db, options: crud.get_sections(db, limit=PAGE, options=options), 1),
+    ("GET /available_courses/", models.Section, schemas.SectionExpandedOut, lambda db, options: crud.get_available_courses(db, "fall", 2024, limit=PAGE, options=options), 1),
+    ("GET /students/", models.Student, schemas.StudentExpandedOut, lambda db, options: crud.get_students(db, limit=PAGE, options=options), 2),
+    ("GET /depts/", models.Dept, schemas.DeptExpandedOut, lambda db, options: crud.get_depts(db, limit=PAGE, options=options), 3),
+]
+
+# Returns [(endpoint with ?expand=, statements, budget)] and a list of
+# problems; no problems when every endpoint is within its budget
+def check():
+    engine = create_engine("sqlite://")
+    database.apply_sqlite_profile(engine, database.settings)
+    models.Base.metadata.create_all(engine)
+    results, problems = [], []
+    sent = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    with Session(engine) as db:
+        _seed(db)
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            for route, model, schema, read, budget in ENDPOINTS:
+                allowed = expand.expandable(model, schema)
+                name = f"{route}?expand={','.join(allowed)}"
+                db.expunge_all()
+                sent.clear()
+                rows = read(db, expand.loader_options(model, ",".join(allowed), allowed))
+                body = [schema.from_orm(row).dict(exclude_unset=True) for row in rows]
+                results.append((name, len(sent), budget))
+                if len(sent) > budget:
+                    problems.append(f"{name}: {len(sent)} statements for {len(rows)} rows, budget {budget}")
+                if len(body) != PAGE or any(key not in item for item in body for key in allowed):
+                    problems.append(f"{name}: expected {PAGE} rows with {', '.join(allowed)} embedded")
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+    engine.dispose()
+    return results, problems
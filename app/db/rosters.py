@@ -0,0 +1,49 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from . import models
+
+# Field names of a roster row, in select order
+COLUMNS = ["section_id", "year", "semester", "student_id", "first_name", "last_name", "dept_code", "dept_name", "grade"]
+
+# One Core statement for the rosters of the sections matching `criteria`:
+# every enrolled student with their department and current grade (the
+# latest grade row for the section, NULL until graded), by section and name.
+# Each join is a key lookup, so the cost is one statement whatever the size.
+def roster_statement(*criteria):
+    later = aliased(models.Grade)
+    latest_grade_id = (
+        select(func.max(later.id))
+        .where(later.student_id == models.StudentSection.student_id, later.section_id == models.StudentSection.section_id)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            models.StudentSection.section_id,
+            models.Section.year.label("year"),
+            models.Section.semester.label("semester"),
+            models.Student.id.label("student_id"),
+            models.Student.first_name.label("first_name"),
+            models.Student.last_name.label("last_name"),
+            models.Student.dept_code.label("dept_code"),
+            models.Dept.name.label("dept_name"),
+            models.Grade.grade.label("grade"),
+        )
+        .join(models.Section, models.Section.id == models.StudentSection.section_id)
+        .join(models.Student, models.Student.id == models.StudentSection.student_id)
+        .outerjoin(models.Dept, models.Dept.code == models.Student.dept_code)
+        .outerjoin(models.Grade, models.Grade.id == latest_grade_id)
+        .where(*criteria)
+        .order_by(models.StudentSection.section_id, models.Student.last_name, models.Student.first_name, models.Student.id)
+    )
+
+# Roster of one section
+def section_roster(section_id: int):
+    return roster_statement(models.StudentSection.section_id == section_id)
+
+# Rosters of every section a professor teaches in one term
+def professor_rosters(professor_id: int, year: int, semester: str):
+    return roster_statement(
+        models.Section.professor_id == professor_id,
+        models.Section.year == year,
+        models.Section.semester == semester,
+    )
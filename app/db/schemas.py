@@ -1,7 +1,30 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, validator
+from pydantic.utils import GetterDict
+from sqlalchemy import inspect
+from typing import ClassVar, Optional, List, Dict, Set
 from datetime import date
 
+# Partial update schemas send only the fields to change. Every field may be
+# left out, but only the ones listed in nullable may be sent as null.
+class PatchModel(BaseModel):
+    nullable: ClassVar[Set[str]] = set()
+
+    @validator("*", pre=True)
+    def null_allowed(cls, value, field):
+        if value is None and field.name not in cls.nullable:
+            raise ValueError("may not be null")
+        return value
+
+# Expanded schemas embed related rows (see app/utils/expand.py). They read
+# only relationships that were eager-loaded: the others are left unset, so
+# they never lazy-load and routes drop them with response_model_exclude_unset.
+class LoadedOnly(GetterDict):
+    def get(self, key, default=None):
+        state = inspect(self._obj, raiseerr=False)
+        if state is not None and key in state.mapper.relationships and key in state.unloaded:
+            return default
+        return getattr(self._obj, key, default)
+
 # User Schema
 class UserBase(BaseModel):
     username: str
@@ -37,6 +60,12 @@ class BookCreate(BookBase):
 class BookUpdate(BookBase):
     pass
 
+class BookPatch(PatchModel):
+    title: Optional[str] = None
+    author: Optional[str] = None
+    pub_date: Optional[date] = None
+    l_code: Optional[int] = None
+
 class BookInDB(BookBase):
     id: int
 
@@ -59,8 +88,17 @@ class BorrowCreate(BorrowBase):
 class BorrowUpdate(BorrowBase):
     pass
 
+class BorrowPatch(PatchModel):
+    nullable: ClassVar[Set[str]] = {"return_time"}
+
+    book_id: Optional[int] = None
+    student_id: Optional[int] = None
+    date_of_borrow: Optional[date] = None
+    return_time: Optional[date] = None
+
 class BorrowInDB(BorrowBase):
     id: int
+    version: int
 
     class Config:
         orm_mode = True
@@ -82,6 +120,13 @@ class CollegeCreate(CollegeBase):
 class CollegeUpdate(CollegeBase):
     pass
 
+class CollegePatch(PatchModel):
+    name: Optional[str] = None
+    office: Optional[int] = None
+    phone: Optional[str] = None
+    dean: Optional[int] = None
+    apikey: Optional[str] = None
+
 class CollegeInDB(CollegeBase):
     id: int
 
@@ -91,6 +136,17 @@ class CollegeInDB(CollegeBase):
 class CollegeOut(CollegeInDB):
     pass
 
+# A college as embedded in other responses, without its API key
+class CollegeRefOut(BaseModel):
+    id: int
+    name: str
+    office: int
+    phone: str
+    dean: int
+
+    class Config:
+        orm_mode = True
+
 # Course Schema
 class CourseBase(BaseModel):
     name: str
@@ -105,6 +161,13 @@ class CourseCreate(CourseBase):
 class CourseUpdate(CourseBase):
     pass
 
+class CoursePatch(PatchModel):
+    name: Optional[str] = None
+    level: Optional[str] = None
+    description: Optional[str] = None
+    dept_code: Optional[int] = None
+    credit: Optional[int] = None
+
 class CourseInDB(CourseBase):
     code: int
 
@@ -149,6 +212,12 @@ class DeptCreate(DeptBase):
 class DeptUpdate(DeptBase):
     pass
 
+class DeptPatch(PatchModel):
+    name: Optional[str] = None
+    office: Optional[int] = None
+    phone: Optional[str] = None
+    college_id: Optional[int] = None
+
 class DeptInDB(DeptBase):
     code: int
 
@@ -170,6 +239,11 @@ class EducationalEmployeeCreate(EducationalEmployeeBase):
 class EducationalEmployeeUpdate(EducationalEmployeeBase):
     pass
 
+class EducationalEmployeePatch(PatchModel):
+    degree: Optional[int] = None
+    edu_id: Optional[int] = None
+    apikey: Optional[str] = None
+
 class EducationalEmployeeInDB(EducationalEmployeeBase):
     id: int
 
@@ -193,6 +267,13 @@ class EmployeeCreate(EmployeeBase):
 class EmployeeUpdate(EmployeeBase):
     pass
 
+class EmployeePatch(PatchModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    position: Optional[str] = None
+    salary: Optional[int] = None
+    department_id: Optional[int] = None
+
 class EmployeeInDB(EmployeeBase):
     id: int
 
@@ -214,6 +295,11 @@ class GradeCreate(GradeBase):
 class GradeUpdate(GradeBase):
     pass
 
+class GradePatch(PatchModel):
+    student_id: Optional[int] = None
+    section_id: Optional[int] = None
+    grade: Optional[int] = None
+
 class GradeInDB(GradeBase):
     id: int
 
@@ -223,6 +309,32 @@ class GradeInDB(GradeBase):
 class GradeOut(GradeInDB):
     pass
 
+# A grade together with its term and course, as shown on a transcript
+class GradeWithCourseOut(GradeOut):
+    year: Optional[int] = None
+    semester: Optional[str] = None
+    course_code: Optional[int] = None
+    course_name: Optional[str] = None
+    credit: Optional[int] = None
+
+# Bulk grade submission Schema
+class SectionGradeEntry(BaseModel):
+    student_id: int
+    grade: int
+
+class SectionGradeResult(BaseModel):
+    student_id: int
+    status: str  # "inserted", "updated" or "rejected"
+    grade_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class SectionGradesOut(BaseModel):
+    section_id: int
+    inserted: int
+    updated: int
+    rejected: int
+    results: List[SectionGradeResult]
+
 # Professor Schema
 class ProfessorBase(BaseModel):
     first_name: str
@@ -236,6 +348,12 @@ class ProfessorCreate(ProfessorBase):
 class ProfessorUpdate(ProfessorBase):
     pass
 
+class ProfessorPatch(PatchModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    phone: Optional[str] = None
+    department_id: Optional[int] = None
+
 class ProfessorInDB(ProfessorBase):
     id: int
 
@@ -256,6 +374,10 @@ class RoomCreate(RoomBase):
 class RoomUpdate(RoomBase):
     pass
 
+class RoomPatch(PatchModel):
+    location: Optional[str] = None
+    capacity: Optional[int] = None
+
 class RoomInDB(RoomBase):
     code: int
 
@@ -279,8 +401,16 @@ class SectionCreate(SectionBase):
 class SectionUpdate(SectionBase):
     pass
 
+class SectionPatch(PatchModel):
+    year: Optional[int] = None
+    semester: Optional[str] = None
+    room_code: Optional[int] = None
+    course_code: Optional[int] = None
+    professor_id: Optional[int] = None
+
 class SectionInDB(SectionBase):
     id: int
+    version: int
 
     class Config:
         orm_mode = True
@@ -302,8 +432,16 @@ class StudentCreate(StudentBase):
 class StudentUpdate(StudentBase):
     pass
 
+class StudentPatch(PatchModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    dept_code: Optional[int] = None
+
 class StudentInDB(StudentBase):
     id: int
+    version: int
 
     class Config:
         orm_mode = True
@@ -311,6 +449,11 @@ class StudentInDB(StudentBase):
 class StudentOut(StudentInDB):
     pass
 
+# StudentSection Schema
+class StudentSectionCreate(BaseModel):
+    student_id: int
+    section_id: int
+
 # Takes Schema
 class TakesBase(BaseModel):
     student_id: int
@@ -324,6 +467,12 @@ class TakesCreate(TakesBase):
 class TakesUpdate(TakesBase):
     pass
 
+class TakesPatch(PatchModel):
+    student_id: Optional[int] = None
+    course_code: Optional[int] = None
+    year: Optional[int] = None
+    semester: Optional[str] = None
+
 class TakesInDB(TakesBase):
     id: int
 
@@ -333,9 +482,91 @@ class TakesInDB(TakesBase):
 class TakesOut(TakesInDB):
     pass
 
+# Transcript Schema
+class TermGpaOut(BaseModel):
+    year: int
+    semester: str
+    credits_attempted: int
+    grade_points: int
+    gpa: Optional[float] = None
+
+    class Config:
+        orm_mode = True
+
+class TranscriptOut(BaseModel):
+    student_id: int
+    credits_attempted: int
+    grade_points: int
+    gpa: Optional[float] = None
+    terms: List[TermGpaOut]
+
+# Grade analytics Schema
+class GradeGroupStats(BaseModel):
+    key: int
+    count: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    percentiles: Dict[str, float]
+    histogram: List[int]
+
+class GradeStatsOut(BaseModel):
+    group_by: str
+    bin_edges: List[float]
+    groups: List[GradeGroupStats]
+
+# Bulk import Schema
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+class ImportReportOut(BaseModel):
+    entity: str
+    rows: int
+    inserted: int
+    rejected: int
+    elapsed_seconds: float
+    rows_per_second: float
+    errors: List[ImportRowError]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
 
 class TokenData(BaseModel):
-    username: Optional[str] = None
\ No newline at end of file
+    username: Optional[str] = None
+# Expanded Schemas (?expand=)
+class SectionExpandedOut(SectionOut):
+    course: Optional[CourseOut] = None
+    room: Optional[RoomOut] = None
+    professor: Optional[ProfessorOut] = None
+
+    class Config:
+        getter_dict = LoadedOnly
+
+class StudentExpandedOut(StudentOut):
+    department: Optional[DeptOut] = None
+    sections: Optional[List[SectionOut]] = None
+
+    class Config:
+        getter_dict = LoadedOnly
+
+class DeptExpandedOut(DeptOut):
+    colleges: Optional[List[CollegeRefOut]] = None
+    professors: Optional[List[ProfessorOut]] = None
+
+    class Config:
+        getter_dict = LoadedOnly
+
+# Student dashboard Schema
+class StudentDashboardOut(BaseModel):
+    student: StudentOut
+    year: int
+    semester: str
+    sections: List[SectionExpandedOut]
+    borrows: List[BorrowOut]
+    latest_grades: List[GradeWithCourseOut]
+    credits_attempted: int
+    grade_points: int
+    gpa: Optional[float] = None
@@ -0,0 +1,21 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.db import analytics, database, schemas
+from app.utils.routing import SessionRoute
+
+router = APIRouter(route_class=SessionRoute)
+
+# API route to get grade statistics grouped by section, course or department
+@router.get("/analytics/grades/{group_by}", response_model=schemas.GradeStatsOut)
+def read_grade_statistics(
+    group_by: analytics.GradeGroup,
+    year: Optional[int] = None,
+    semester: Optional[str] = None,
+    key: Optional[int] = None,
+    bins: int = Query(10, ge=1, le=100),
+    db: Session = Depends(database.get_db),
+):
+    keys, grades = analytics.load_grades(db, group_by, year=year, semester=semester, key=key)
+    stats = analytics.grade_statistics(keys, grades, bins=bins)
+    return {"group_by": group_by.value, **stats}
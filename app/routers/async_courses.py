@@ -0,0 +1,64 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import async_crud, models, schemas
+from app.db.async_database import get_async_db
+from app.routers.courses import enqueue_registration, register_direct, settings
+from app.routers.sections import expand_sections
+from app.utils import pagination
+from app.utils.routing import SessionRoute
+
+# Async variants of the catalog and registration routes, mounted ahead of
+# the sync router when DB_MODE=async
+router = APIRouter(route_class=SessionRoute)
+
+# API route to get all courses
+@router.get("/courses/", response_model=List[schemas.CourseOut])
+async def read_courses(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    courses = await async_crud.get_courses(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, courses, models.Course, limit, sort)
+    return courses
+
+# API route to get a course by ID
+@router.get("/courses/{course_code}", response_model=schemas.CourseOut)
+async def read_course(course_code: int, db: AsyncSession = Depends(get_async_db)):
+    course = await async_crud.get_course(db, course_code=course_code)
+    if course is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return course
+
+# Get available courses for the next semester
+@router.get("/available_courses/", response_model=List[schemas.SectionExpandedOut], response_model_exclude_unset=True)
+async def read_available_courses(response: Response, semester: str, year: int, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, options: list = Depends(expand_sections), db: AsyncSession = Depends(get_async_db)):
+    courses = await async_crud.get_available_courses(db, semester=semester, year=year, skip=skip, limit=limit, cursor=cursor, sort=sort, options=options)
+    pagination.set_next_cursor(response, courses, models.Section, limit, sort)
+    return courses
+
+# Register course selection for a student
+@router.post("/register_course/")
+async def register_course(student_id: int, section_id: int, response: Response, waitlist: bool = False, db: AsyncSession = Depends(get_async_db)):
+    if settings.registration_mode == "queued":
+        return enqueue_registration(student_id, section_id, waitlist, response)
+    return await db.run_sync(register_direct, student_id, section_id, waitlist, response)
+
+# Drop a course selection; the next waitlisted student takes the seat
+@router.post("/drop_course/")
+async def drop_course(student_id: int, section_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await async_crud.drop_course_selection(db, student_id=student_id, section_id=section_id):
+        raise HTTPException(status_code=404, detail="Student is not registered for this section")
+    return {"message": "Course dropped successfully"}
+
+# Get a student's position on a section's waitlist
+@router.get("/waitlist/{section_id}/{student_id}")
+async def read_waitlist_position(section_id: int, student_id: int, db: AsyncSession = Depends(get_async_db)):
+    position = await async_crud.get_waitlist_position(db, student_id=student_id, section_id=section_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Student is not on the waitlist")
+    return {"section_id": section_id, "student_id": student_id, "position": position}
+
+# Take a student off a section's waitlist
+@router.delete("/waitlist/{section_id}/{student_id}")
+async def withdraw_from_waitlist(section_id: int, student_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await async_crud.withdraw_from_waitlist(db, student_id=student_id, section_id=section_id) is None:
+        raise HTTPException(status_code=404, detail="Student is not on the waitlist")
+    return {"message": "Student removed from the waitlist"}
@@ -0,0 +1,28 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import async_crud, models, schemas
+from app.db.async_database import get_async_db
+from app.routers.sections import expand_sections
+from app.utils import pagination, versioning
+from app.utils.routing import SessionRoute
+
+# Async variants of the section read routes, mounted ahead of the sync
+# router when DB_MODE=async
+router = APIRouter(route_class=SessionRoute)
+
+# API route to get all sections
+@router.get("/sections/", response_model=List[schemas.SectionExpandedOut], response_model_exclude_unset=True)
+async def read_sections(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, options: list = Depends(expand_sections), db: AsyncSession = Depends(get_async_db)):
+    sections = await async_crud.get_sections(db, skip=skip, limit=limit, cursor=cursor, sort=sort, options=options)
+    pagination.set_next_cursor(response, sections, models.Section, limit, sort)
+    return sections
+
+# API route to get a section by ID
+@router.get("/sections/{section_id}", response_model=schemas.SectionExpandedOut, response_model_exclude_unset=True)
+async def read_section(section_id: int, response: Response, options: list = Depends(expand_sections), db: AsyncSession = Depends(get_async_db)):
+    section = await async_crud.get_section(db, section_id=section_id, options=options)
+    if section is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    versioning.set_etag(response, section)
+    return section
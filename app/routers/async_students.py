@@ -0,0 +1,51 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import async_crud, dashboard, models, schemas
+from app.db.async_database import AsyncSessionLocal, get_async_db
+from app.routers.students import expand_students, transcript_out
+from app.utils import pagination, versioning
+from app.utils.auth import get_current_user
+from app.utils.routing import SessionRoute
+
+# Async variants of the student read routes, mounted ahead of the sync
+# router when DB_MODE=async
+router = APIRouter(route_class=SessionRoute)
+
+# API route to get all students
+@router.get("/students/", response_model=List[schemas.StudentExpandedOut], response_model_exclude_unset=True)
+async def read_students(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, options: list = Depends(expand_students), db: AsyncSession = Depends(get_async_db)):
+    students = await async_crud.get_students(db, skip=skip, limit=limit, cursor=cursor, sort=sort, options=options)
+    pagination.set_next_cursor(response, students, models.Student, limit, sort)
+    return students
+
+# API route to get a student by ID
+@router.get("/students/{student_id}", response_model=schemas.StudentExpandedOut, response_model_exclude_unset=True)
+async def read_student(student_id: int, response: Response, options: list = Depends(expand_students), db: AsyncSession = Depends(get_async_db)):
+    student = await async_crud.get_student(db, student_id=student_id, options=options)
+    if student is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    versioning.set_etag(response, student)
+    return student
+
+# API route to get a student's grades for one term, with course info
+@router.get("/grades/{student_id}/{semester}/{year}", response_model=List[schemas.GradeWithCourseOut])
+async def read_grades(student_id: int, semester: str, year: int, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(get_current_user)):
+    grades = await async_crud.get_grades_by_student_and_semester(db, student_id=student_id, semester=semester, year=year)
+    if not grades:
+        raise HTTPException(status_code=404, detail="Grades not found")
+    return grades
+
+# API route to get the student home page in one response; the five
+# queries run concurrently, each on its own connection
+@router.get("/students/{student_id}/dashboard", response_model=schemas.StudentDashboardOut)
+async def read_dashboard(student_id: int, year: int, semester: str, latest_grades: int = Query(dashboard.LATEST_GRADES, ge=0, le=50), current_user: models.User = Depends(get_current_user)):
+    payload = await dashboard.load_async(AsyncSessionLocal, student_id, year, semester, latest_grades)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return payload
+
+# API route to get a student's transcript with per-term and cumulative GPA
+@router.get("/students/{student_id}/transcript", response_model=schemas.TranscriptOut)
+async def read_transcript(student_id: int, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(get_current_user)):
+    return transcript_out(student_id, await async_crud.get_term_gpas(db, student_id=student_id))
@@ -1,27 +1,22 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
 from app.db import crud, models, database, schemas
+from app.utils import pagination
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=SessionRoute)
 
 # API route to get all books
 @router.get("/books/", response_model=List[schemas.BookOut])
-def read_books(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    books = crud.get_books(db, skip=skip, limit=limit)
+def read_books(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(database.get_db)):
+    books = crud.get_books(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, books, models.Book, limit, sort)
     return books
 
 # API route to get a book by ID
 @router.get("/books/{book_id}", response_model=schemas.BookOut)
-def read_book(book_id: int, db: Session = Depends(get_db)):
+def read_book(book_id: int, db: Session = Depends(database.get_db)):
     book = crud.get_book(db, book_id=book_id)
     if book is None:
         raise HTTPException(status_code=404, detail="Book not found")
@@ -29,20 +24,28 @@ def read_book(book_id: int, db: Session = Depends(get_db)):
 
 # API route to create a new book
 @router.post("/books/", response_model=schemas.BookOut)
-def create_book(book: schemas.BookCreate, db: Session = Depends(get_db)):
+def create_book(book: schemas.BookCreate, db: Session = Depends(database.get_db)):
     return crud.create_book(db=db, book=book)
 
 # API route to update a book by ID
 @router.put("/books/{book_id}", response_model=schemas.BookOut)
-def update_book(book_id: int, book_update: schemas.BookUpdate, db: Session = Depends(get_db)):
+def update_book(book_id: int, book_update: schemas.BookUpdate, db: Session = Depends(database.get_db)):
     book = crud.update_book(db=db, book_id=book_id, book_update=book_update)
     if book is None:
         raise HTTPException(status_code=404, detail="Book not found")
     return book
 
+# API route to partially update a book by ID
+@router.patch("/books/{book_id}", response_model=schemas.BookOut)
+def patch_book(book_id: int, book_patch: schemas.BookPatch, db: Session = Depends(database.get_db)):
+    book = crud.patch_book(db, book_id, book_patch.dict(exclude_unset=True))
+    if book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return book
+
 # API route to delete a book by ID
 @router.delete("/books/{book_id}", response_model=schemas.BookOut)
-def delete_book(book_id: int, db: Session = Depends(get_db)):
+def delete_book(book_id: int, db: Session = Depends(database.get_db)):
     book = crud.delete_book(db=db, book_id=book_id)
     if book is None:
         raise HTTPException(status_code=404, detail="Book not found")
@@ -1,40 +1,56 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
-from app.db import crud, database, schemas
+from app.db import crud, models, database, schemas
+from app.utils import pagination, versioning
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=SessionRoute)
 
 # API route to get all borrows
 @router.get("/borrows/", response_model=List[schemas.BorrowOut])
-def read_borrows(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    borrows = crud.get_borrows(db, skip=skip, limit=limit)
+def read_borrows(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(database.get_db)):
+    borrows = crud.get_borrows(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, borrows, models.Borrow, limit, sort)
     return borrows
 
+# API route to get a borrow by ID
+@router.get("/borrows/{borrow_id}", response_model=schemas.BorrowOut)
+def read_borrow(borrow_id: int, response: Response, db: Session = Depends(database.get_db)):
+    borrow = crud.get_borrow(db, borrow_id=borrow_id)
+    if borrow is None:
+        raise HTTPException(status_code=404, detail="Borrow not found")
+    versioning.set_etag(response, borrow)
+    return borrow
+
 # API route to create a new borrow
 @router.post("/borrows/", response_model=schemas.BorrowOut)
-def create_borrow(borrow: schemas.BorrowCreate, db: Session = Depends(get_db)):
-    return crud.create_borrow(db=db, borrow=borrow)
+def create_borrow(borrow: schemas.BorrowCreate, response: Response, db: Session = Depends(database.get_db)):
+    db_borrow = crud.create_borrow(db=db, borrow=borrow)
+    versioning.set_etag(response, db_borrow)
+    return db_borrow
 
 # API route to update a borrow by ID
 @router.put("/borrows/{borrow_id}", response_model=schemas.BorrowOut)
-def update_borrow(borrow_id: int, borrow_update: schemas.BorrowUpdate, db: Session = Depends(get_db)):
-    borrow = crud.update_borrow(db=db, borrow_id=borrow_id, borrow_update=borrow_update)
+def update_borrow(borrow_id: int, borrow_update: schemas.BorrowUpdate, response: Response, versions: Optional[List[int]] = Depends(versioning.if_match), db: Session = Depends(database.get_db)):
+    borrow = crud.update_borrow(db=db, borrow_id=borrow_id, borrow_update=borrow_update, versions=versions)
+    if borrow is None:
+        raise HTTPException(status_code=404, detail="Borrow not found")
+    versioning.set_etag(response, borrow)
+    return borrow
+
+# API route to partially update a borrow by ID
+@router.patch("/borrows/{borrow_id}", response_model=schemas.BorrowOut)
+def patch_borrow(borrow_id: int, borrow_patch: schemas.BorrowPatch, response: Response, versions: Optional[List[int]] = Depends(versioning.if_match), db: Session = Depends(database.get_db)):
+    borrow = crud.patch_borrow(db, borrow_id, borrow_patch.dict(exclude_unset=True), versions)
     if borrow is None:
         raise HTTPException(status_code=404, detail="Borrow not found")
+    versioning.set_etag(response, borrow)
     return borrow
 
 # API route to delete a borrow by ID
 @router.delete("/borrows/{borrow_id}", response_model=schemas.BorrowOut)
-def delete_borrow(borrow_id: int, db: Session = Depends(get_db)):
+def delete_borrow(borrow_id: int, db: Session = Depends(database.get_db)):
     borrow = crud.delete_borrow(db=db, borrow_id=borrow_id)
     if borrow is None:
         raise HTTPException(status_code=404, detail="Borrow not found")
@@ -1,27 +1,22 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
-from app.db import crud, schemas, database
+from app.db import crud, models, schemas, database
+from app.utils import pagination
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=SessionRoute)
 
 # API route to get all colleges
 @router.get("/colleges/", response_model=List[schemas.CollegeOut])
-def read_colleges(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    colleges = crud.get_colleges(db, skip=skip, limit=limit)
+def read_colleges(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(database.get_db)):
+    colleges = crud.get_colleges(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, colleges, models.College, limit, sort)
     return colleges
 
 # API route to get a college by ID
 @router.get("/colleges/{college_id}", response_model=schemas.CollegeOut)
-def read_college(college_id: int, db: Session = Depends(get_db)):
+def read_college(college_id: int, db: Session = Depends(database.get_db)):
     college = crud.get_college(db, college_id=college_id)
     if college is None:
         raise HTTPException(status_code=404, detail="College not found")
@@ -29,20 +24,28 @@ def read_college(college_id: int, db: Session = Depends(get_db)):
 
 # API route to create a new college
 @router.post("/colleges/", response_model=schemas.CollegeOut)
-def create_college(college: schemas.CollegeCreate, db: Session = Depends(get_db)):
+def create_college(college: schemas.CollegeCreate, db: Session = Depends(database.get_db)):
     return crud.create_college(db=db, college=college)
 
 # API route to update a college by ID
 @router.put("/colleges/{college_id}", response_model=schemas.CollegeOut)
-def update_college(college_id: int, college_update: schemas.CollegeUpdate, db: Session = Depends(get_db)):
+def update_college(college_id: int, college_update: schemas.CollegeUpdate, db: Session = Depends(database.get_db)):
     college = crud.update_college(db=db, college_id=college_id, college_update=college_update)
     if college is None:
         raise HTTPException(status_code=404, detail="College not found")
     return college
 
+# API route to partially update a college by ID
+@router.patch("/colleges/{college_id}", response_model=schemas.CollegeOut)
+def patch_college(college_id: int, college_patch: schemas.CollegePatch, db: Session = Depends(database.get_db)):
+    college = crud.patch_college(db, college_id, college_patch.dict(exclude_unset=True))
+    if college is None:
+        raise HTTPException(status_code=404, detail="College not found")
+    return college
+
 # API route to delete a college by ID
 @router.delete("/colleges/{college_id}", response_model=schemas.CollegeOut)
-def delete_college(college_id: int, db: Session = Depends(get_db)):
+def delete_college(college_id: int, db: Session = Depends(database.get_db)):
     college = crud.delete_college(db=db, college_id=college_id)
     if college is None:
         raise HTTPException(status_code=404, detail="College not found")
@@ -1,27 +1,26 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
-from app.db import crud, schemas, database
+from app.db import crud, models, schemas, database
+from app.routers.sections import expand_sections
+from app.utils import pagination
+from app.utils.registration_queue import registration_queue
+from app.utils.routing import SessionRoute
+from config import get_settings
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=SessionRoute)
+settings = get_settings()
 
 # API route to get all courses
 @router.get("/courses/", response_model=List[schemas.CourseOut])
-def read_courses(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    courses = crud.get_courses(db, skip=skip, limit=limit)
+def read_courses(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(database.get_db)):
+    courses = crud.get_courses(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, courses, models.Course, limit, sort)
     return courses
 
 # API route to get a course by ID
 @router.get("/courses/{course_code}", response_model=schemas.CourseOut)
-def read_course(course_code: int, db: Session = Depends(get_db)):
+def read_course(course_code: int, db: Session = Depends(database.get_db)):
     course = crud.get_course(db, course_code=course_code)
     if course is None:
         raise HTTPException(status_code=404, detail="Course not found")
@@ -29,35 +28,98 @@ def read_course(course_code: int, db: Session = Depends(get_db)):
 
 # API route to create a new course
 @router.post("/courses/", response_model=schemas.CourseOut)
-def create_course(course: schemas.CourseCreate, db: Session = Depends(get_db)):
+def create_course(course: schemas.CourseCreate, db: Session = Depends(database.get_db)):
     return crud.create_course(db=db, course=course)
 
 # API route to update a course by ID
 @router.put("/courses/{course_code}", response_model=schemas.CourseOut)
-def update_course(course_code: int, course_update: schemas.CourseUpdate, db: Session = Depends(get_db)):
+def update_course(course_code: int, course_update: schemas.CourseUpdate, db: Session = Depends(database.get_db)):
     course = crud.update_course(db=db, course_code=course_code, course_update=course_update)
     if course is None:
         raise HTTPException(status_code=404, detail="Course not found")
     return course
 
+# API route to partially update a course by ID
+@router.patch("/courses/{course_code}", response_model=schemas.CourseOut)
+def patch_course(course_code: int, course_patch: schemas.CoursePatch, db: Session = Depends(database.get_db)):
+    course = crud.patch_course(db, course_code, course_patch.dict(exclude_unset=True))
+    if course is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return course
+
 # API route to delete a course by ID
 @router.delete("/courses/{course_code}", response_model=schemas.CourseOut)
-def delete_course(course_code: int, db: Session = Depends(get_db)):
+def delete_course(course_code: int, db: Session = Depends(database.get_db)):
     course = crud.delete_course(db=db, course_code=course_code)
     if course is None:
         raise HTTPException(status_code=404, detail="Course not found")
     return course
 
 # Get available courses for the next semester
-@router.get("/available_courses/", response_model=List[schemas.SectionOut])
-def read_available_courses(semester: str, year: int, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    courses = crud.get_available_courses(db, semester=semester, year=year, skip=skip, limit=limit)
+@router.get("/available_courses/", response_model=List[schemas.SectionExpandedOut], response_model_exclude_unset=True)
+def read_available_courses(response: Response, semester: str, year: int, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, options: list = Depends(expand_sections), db: Session = Depends(database.get_db)):
+    courses = crud.get_available_courses(db, semester=semester, year=year, skip=skip, limit=limit, cursor=cursor, sort=sort, options=options)
+    pagination.set_next_cursor(response, courses, models.Section, limit, sort)
     return courses
 
 # Register course selection for a student
 @router.post("/register_course/")
-def register_course(student_id: int, section_id: int, db: Session = Depends(get_db)):
-    section = crud.register_course_selection(db, student_id=student_id, section_id=section_id)
-    if section is None:
+def register_course(student_id: int, section_id: int, response: Response, waitlist: bool = False, db: Session = Depends(database.get_db)):
+    if settings.registration_mode == "queued":
+        return enqueue_registration(student_id, section_id, waitlist, response)
+    return register_direct(db, student_id, section_id, waitlist, response)
+
+# Register inline and map the outcome to a response; the async router runs
+# this through run_sync
+def register_direct(db: Session, student_id: int, section_id: int, waitlist: bool, response: Response):
+    result = crud.register_course_selection(db, student_id=student_id, section_id=section_id, waitlist=waitlist)
+    if result is None:
         raise HTTPException(status_code=404, detail="Section or Student not found")
+    if result == crud.SECTION_FULL:
+        raise HTTPException(status_code=409, detail="Section is full")
+    if result == crud.ALREADY_REGISTERED:
+        raise HTTPException(status_code=409, detail="Student is already registered for this section")
+    if result in (crud.WAITLISTED, crud.ALREADY_WAITLISTED):
+        response.status_code = 202
+        position = crud.get_waitlist_position(db, student_id=student_id, section_id=section_id)
+        return {"message": "Section is full, student is on the waitlist", "position": position}
     return {"message": "Course registered successfully"}
+
+# In queued mode registrations are admitted into a bounded queue and the
+# client polls its ticket; a full queue sheds load with 503 + Retry-After
+def enqueue_registration(student_id: int, section_id: int, waitlist: bool, response: Response):
+    ticket_id = registration_queue.submit(student_id, section_id, waitlist)
+    if ticket_id is None:
+        raise HTTPException(status_code=503, detail="Registration queue is full, retry shortly", headers={"Retry-After": "5"})
+    response.status_code = 202
+    return {"ticket_id": ticket_id, "status": "queued"}
+
+# Poll the status of a queued registration
+@router.get("/register_course/{ticket_id}")
+def read_registration_ticket(ticket_id: str):
+    status = registration_queue.status(ticket_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return {"ticket_id": ticket_id, "status": status}
+
+# Drop a course selection; the next waitlisted student takes the seat
+@router.post("/drop_course/")
+def drop_course(student_id: int, section_id: int, db: Session = Depends(database.get_db)):
+    if not crud.drop_course_selection(db, student_id=student_id, section_id=section_id):
+        raise HTTPException(status_code=404, detail="Student is not registered for this section")
+    return {"message": "Course dropped successfully"}
+
+# Get a student's position on a section's waitlist
+@router.get("/waitlist/{section_id}/{student_id}")
+def read_waitlist_position(section_id: int, student_id: int, db: Session = Depends(database.get_db)):
+    position = crud.get_waitlist_position(db, student_id=student_id, section_id=section_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Student is not on the waitlist")
+    return {"section_id": section_id, "student_id": student_id, "position": position}
+
+# Take a student off a section's waitlist
+@router.delete("/waitlist/{section_id}/{student_id}")
+def withdraw_from_waitlist(section_id: int, student_id: int, db: Session = Depends(database.get_db)):
+    if crud.withdraw_from_waitlist(db, student_id=student_id, section_id=section_id) is None:
+        raise HTTPException(status_code=404, detail="Student is not on the waitlist")
+    return {"message": "Student removed from the waitlist"}
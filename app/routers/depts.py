@@ -1,48 +1,54 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
-from app.db import crud, database, schemas
+from app.db import crud, models, database, schemas
+from app.utils import expand, pagination
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
+router = APIRouter(route_class=SessionRoute)
 
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ?expand= accepts colleges and professors
+expand_depts = expand.expansions(models.Dept, schemas.DeptExpandedOut)
 
 # API route to get all departments
-@router.get("/depts/", response_model=List[schemas.DeptOut])
-def read_depts(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    depts = crud.get_depts(db, skip=skip, limit=limit)
+@router.get("/depts/", response_model=List[schemas.DeptExpandedOut], response_model_exclude_unset=True)
+def read_depts(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, options: list = Depends(expand_depts), db: Session = Depends(database.get_db)):
+    depts = crud.get_depts(db, skip=skip, limit=limit, cursor=cursor, sort=sort, options=options)
+    pagination.set_next_cursor(response, depts, models.Dept, limit, sort)
     return depts
 
 # API route to get a department by code
-@router.get("/depts/{dept_code}", response_model=schemas.DeptOut)
-def read_dept(dept_code: int, db: Session = Depends(get_db)):
-    dept = crud.get_dept(db, dept_code=dept_code)
+@router.get("/depts/{dept_code}", response_model=schemas.DeptExpandedOut, response_model_exclude_unset=True)
+def read_dept(dept_code: int, options: list = Depends(expand_depts), db: Session = Depends(database.get_db)):
+    dept = crud.get_dept(db, dept_code=dept_code, options=options)
     if dept is None:
         raise HTTPException(status_code=404, detail="Department not found")
     return dept
 
 # API route to create a new department
 @router.post("/depts/", response_model=schemas.DeptOut)
-def create_dept(dept: schemas.DeptCreate, db: Session = Depends(get_db)):
+def create_dept(dept: schemas.DeptCreate, db: Session = Depends(database.get_db)):
     return crud.create_dept(db=db, dept=dept)
 
 # API route to update a department by code
 @router.put("/depts/{dept_code}", response_model=schemas.DeptOut)
-def update_dept(dept_code: int, dept_update: schemas.DeptUpdate, db: Session = Depends(get_db)):
+def update_dept(dept_code: int, dept_update: schemas.DeptUpdate, db: Session = Depends(database.get_db)):
     dept = crud.update_dept(db=db, dept_code=dept_code, dept_update=dept_update)
     if dept is None:
         raise HTTPException(status_code=404, detail="Department not found")
     return dept
 
+# API route to partially update a department by code
+@router.patch("/depts/{dept_code}", response_model=schemas.DeptOut)
+def patch_dept(dept_code: int, dept_patch: schemas.DeptPatch, db: Session = Depends(database.get_db)):
+    dept = crud.patch_dept(db, dept_code, dept_patch.dict(exclude_unset=True))
+    if dept is None:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return dept
+
 # API route to delete a department by code
 @router.delete("/depts/{dept_code}", response_model=schemas.DeptOut)
-def delete_dept(dept_code: int, db: Session = Depends(get_db)):
+def delete_dept(dept_code: int, db: Session = Depends(database.get_db)):
     dept = crud.delete_dept(db=db, dept_code=dept_code)
     if dept is None:
         raise HTTPException(status_code=404, detail="Department not found")
@@ -1,27 +1,22 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
-from app.db import crud, schemas, database
+from app.db import crud, models, schemas, database
+from app.utils import pagination
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=SessionRoute)
 
 # API route to get all educational employees
 @router.get("/educational_employees/", response_model=List[schemas.EducationalEmployeeOut])
-def read_educational_employees(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    educational_employees = crud.get_educational_employees(db, skip=skip, limit=limit)
+def read_educational_employees(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(database.get_db)):
+    educational_employees = crud.get_educational_employees(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, educational_employees, models.EducationalEmployee, limit, sort)
     return educational_employees
 
 # API route to get an educational employee by ID
 @router.get("/educational_employees/{edu_id}", response_model=schemas.EducationalEmployeeOut)
-def read_educational_employee(edu_id: int, db: Session = Depends(get_db)):
+def read_educational_employee(edu_id: int, db: Session = Depends(database.get_db)):
     educational_employee = crud.get_educational_employee(db, edu_id=edu_id)
     if educational_employee is None:
         raise HTTPException(status_code=404, detail="Educational employee not found")
@@ -29,20 +24,28 @@ def read_educational_employee(edu_id: int, db: Session = Depends(get_db)):
 
 # API route to create a new educational employee
 @router.post("/educational_employees/", response_model=schemas.EducationalEmployeeOut)
-def create_educational_employee(educational_employee: schemas.EducationalEmployeeCreate, db: Session = Depends(get_db)):
+def create_educational_employee(educational_employee: schemas.EducationalEmployeeCreate, db: Session = Depends(database.get_db)):
     return crud.create_educational_employee(db=db, educational_employee=educational_employee)
 
 # API route to update an educational employee by ID
 @router.put("/educational_employees/{edu_id}", response_model=schemas.EducationalEmployeeOut)
-def update_educational_employee(edu_id: int, educational_employee_update: schemas.EducationalEmployeeUpdate, db: Session = Depends(get_db)):
+def update_educational_employee(edu_id: int, educational_employee_update: schemas.EducationalEmployeeUpdate, db: Session = Depends(database.get_db)):
     educational_employee = crud.update_educational_employee(db=db, edu_id=edu_id, educational_employee_update=educational_employee_update)
     if educational_employee is None:
         raise HTTPException(status_code=404, detail="Educational employee not found")
     return educational_employee
 
+# API route to partially update an educational employee by ID
+@router.patch("/educational_employees/{edu_id}", response_model=schemas.EducationalEmployeeOut)
+def patch_educational_employee(edu_id: int, educational_employee_patch: schemas.EducationalEmployeePatch, db: Session = Depends(database.get_db)):
+    educational_employee = crud.patch_educational_employee(db, edu_id, educational_employee_patch.dict(exclude_unset=True))
+    if educational_employee is None:
+        raise HTTPException(status_code=404, detail="Educational employee not found")
+    return educational_employee
+
 # API route to delete an educational employee by ID
 @router.delete("/educational_employees/{edu_id}", response_model=schemas.EducationalEmployeeOut)
-def delete_educational_employee(edu_id: int, db: Session = Depends(get_db)):
+def delete_educational_employee(edu_id: int, db: Session = Depends(database.get_db)):
     educational_employee = crud.delete_educational_employee(db=db, edu_id=edu_id)
     if educational_employee is None:
         raise HTTPException(status_code=404, detail="Educational employee not found")
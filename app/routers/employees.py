@@ -1,27 +1,22 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
-from app.db import crud, schemas, database
+from app.db import crud, models, schemas, database
+from app.utils import pagination
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=SessionRoute)
 
 # API route to get all employees
 @router.get("/employees/", response_model=List[schemas.EmployeeOut])
-def read_employees(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    employees = crud.get_employees(db, skip=skip, limit=limit)
+def read_employees(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(database.get_db)):
+    employees = crud.get_employees(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, employees, models.Employee, limit, sort)
     return employees
 
 # API route to get an employee by ID
 @router.get("/employees/{employee_id}", response_model=schemas.EmployeeOut)
-def read_employee(employee_id: int, db: Session = Depends(get_db)):
+def read_employee(employee_id: int, db: Session = Depends(database.get_db)):
     employee = crud.get_employee(db, employee_id=employee_id)
     if employee is None:
         raise HTTPException(status_code=404, detail="Employee not found")
@@ -29,20 +24,28 @@ def read_employee(employee_id: int, db: Session = Depends(get_db)):
 
 # API route to create a new employee
 @router.post("/employees/", response_model=schemas.EmployeeOut)
-def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(get_db)):
+def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(database.get_db)):
     return crud.create_employee(db=db, employee=employee)
 
 # API route to update an employee by ID
 @router.put("/employees/{employee_id}", response_model=schemas.EmployeeOut)
-def update_employee(employee_id: int, employee_update: schemas.EmployeeUpdate, db: Session = Depends(get_db)):
+def update_employee(employee_id: int, employee_update: schemas.EmployeeUpdate, db: Session = Depends(database.get_db)):
     employee = crud.update_employee(db=db, employee_id=employee_id, employee_update=employee_update)
     if employee is None:
         raise HTTPException(status_code=404, detail="Employee not found")
     return employee
 
+# API route to partially update an employee by ID
+@router.patch("/employees/{employee_id}", response_model=schemas.EmployeeOut)
+def patch_employee(employee_id: int, employee_patch: schemas.EmployeePatch, db: Session = Depends(database.get_db)):
+    employee = crud.patch_employee(db, employee_id, employee_patch.dict(exclude_unset=True))
+    if employee is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return employee
+
 # API route to delete an employee by ID
 @router.delete("/employees/{employee_id}", response_model=schemas.EmployeeOut)
-def delete_employee(employee_id: int, db: Session = Depends(get_db)):
+def delete_employee(employee_id: int, db: Session = Depends(database.get_db)):
     employee = crud.delete_employee(db=db, employee_id=employee_id)
     if employee is None:
         raise HTTPException(status_code=404, detail="Employee not found")
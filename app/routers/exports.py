@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.db import database, exporter, models
+from app.utils import streaming
+from app.utils.auth import get_current_user
+
+router = APIRouter()
+
+# API route to stream a whole table as CSV, JSON or NDJSON. Rows come straight
+# from a server-side cursor, so memory stays flat whatever the table size.
+@router.get("/export/{entity}")
+def export_entity(
+    entity: str,
+    format: str = "csv",
+    batch_size: int = Query(streaming.DEFAULT_BATCH_SIZE, ge=1, le=10000),
+    current_user: models.User = Depends(get_current_user),
+):
+    if entity not in exporter.ENTITIES:
+        raise HTTPException(status_code=404, detail="Unknown export entity")
+    if format not in streaming.ENCODERS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(streaming.ENCODERS)}")
+    columns, stmt = exporter.export_statement(entity)
+    return StreamingResponse(
+        streaming.stream_rows(database.read_engine(), stmt, columns, format, batch_size),
+        media_type=streaming.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'},
+    )
@@ -0,0 +1,27 @@
+import os
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, File, Query, UploadFile
+from sqlalchemy.orm import Session
+from app.db import database, importer, models, schemas
+from app.utils.auth import get_current_user
+from app.utils.routing import SessionRoute
+
+router = APIRouter(route_class=SessionRoute)
+
+# API route to bulk import students, courses, sections or enrollments from
+# a CSV or NDJSON upload (format defaults to the file extension)
+@router.post("/import/{entity}", response_model=schemas.ImportReportOut)
+def import_entity(
+    entity: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    if entity not in importer.ENTITIES:
+        raise HTTPException(status_code=404, detail="Unknown import entity")
+    format = format or os.path.splitext(file.filename or "")[1].lstrip(".").lower()
+    if format not in importer.FORMATS:
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+    return importer.import_stream(db, entity, file.file, format, chunk_size=chunk_size)
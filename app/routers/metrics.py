@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from app.db import database
+from app.db.pool import pool_stats
+from app.utils.cache import reference_cache
+from config import get_settings
+
+router = APIRouter()
+settings = get_settings()
+
+# API route to get live connection pool statistics for sizing the pool
+@router.get("/metrics/pool")
+def read_pool_metrics():
+    metrics = {"sync": pool_stats(database.engine)}
+    for i, replica in enumerate(database.replica_engines):
+        metrics[f"sync_replica_{i}"] = pool_stats(replica)
+    if settings.db_mode == "async":
+        from app.db.async_database import async_engine, async_replica_engines
+
+        metrics["async"] = pool_stats(async_engine.sync_engine)
+        for i, replica in enumerate(async_replica_engines):
+            metrics[f"async_replica_{i}"] = pool_stats(replica.sync_engine)
+    return metrics
+
+# API route to get the reference data cache's hit/miss counters and size
+@router.get("/metrics/cache")
+def read_cache_metrics():
+    return reference_cache.stats()
@@ -1,27 +1,22 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
-from app.db import crud, schemas, database
+from app.db import crud, models, schemas, database
+from app.utils import pagination
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=SessionRoute)
 
 # API route to get all professors
 @router.get("/professors/", response_model=List[schemas.ProfessorOut])
-def read_professors(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    professors = crud.get_professors(db, skip=skip, limit=limit)
+def read_professors(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(database.get_db)):
+    professors = crud.get_professors(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, professors, models.Professor, limit, sort)
     return professors
 
 # API route to get a professor by ID
 @router.get("/professors/{professor_id}", response_model=schemas.ProfessorOut)
-def read_professor(professor_id: int, db: Session = Depends(get_db)):
+def read_professor(professor_id: int, db: Session = Depends(database.get_db)):
     professor = crud.get_professor(db, professor_id=professor_id)
     if professor is None:
         raise HTTPException(status_code=404, detail="Professor not found")
@@ -29,20 +24,28 @@ def read_professor(professor_id: int, db: Session = Depends(get_db)):
 
 # API route to create a new professor
 @router.post("/professors/", response_model=schemas.ProfessorOut)
-def create_professor(professor: schemas.ProfessorCreate, db: Session = Depends(get_db)):
+def create_professor(professor: schemas.ProfessorCreate, db: Session = Depends(database.get_db)):
     return crud.create_professor(db=db, professor=professor)
 
 # API route to update a professor by ID
 @router.put("/professors/{professor_id}", response_model=schemas.ProfessorOut)
-def update_professor(professor_id: int, professor_update: schemas.ProfessorUpdate, db: Session = Depends(get_db)):
+def update_professor(professor_id: int, professor_update: schemas.ProfessorUpdate, db: Session = Depends(database.get_db)):
     professor = crud.update_professor(db=db, professor_id=professor_id, professor_update=professor_update)
     if professor is None:
         raise HTTPException(status_code=404, detail="Professor not found")
     return professor
 
+# API route to partially update a professor by ID
+@router.patch("/professors/{professor_id}", response_model=schemas.ProfessorOut)
+def patch_professor(professor_id: int, professor_patch: schemas.ProfessorPatch, db: Session = Depends(database.get_db)):
+    professor = crud.patch_professor(db, professor_id, professor_patch.dict(exclude_unset=True))
+    if professor is None:
+        raise HTTPException(status_code=404, detail="Professor not found")
+    return professor
+
 # API route to delete a professor by ID
 @router.delete("/professors/{professor_id}", response_model=schemas.ProfessorOut)
-def delete_professor(professor_id: int, db: Session = Depends(get_db)):
+def delete_professor(professor_id: int, db: Session = Depends(database.get_db)):
     professor = crud.delete_professor(db=db, professor_id=professor_id)
     if professor is None:
         raise HTTPException(status_code=404, detail="Professor not found")
@@ -1,49 +1,98 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.db import crud, schemas, database
+from app.db import crud, models, schemas, database, rosters
+from app.utils import expand, pagination, streaming, versioning
+from app.utils.auth import get_current_user
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
+router = APIRouter(route_class=SessionRoute)
 
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ?expand= accepts course, room and professor
+expand_sections = expand.expansions(models.Section, schemas.SectionExpandedOut)
 
 # API route to get all sections
-@router.get("/sections/", response_model=List[schemas.SectionOut])
-def read_sections(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    sections = crud.get_sections(db, skip=skip, limit=limit)
+@router.get("/sections/", response_model=List[schemas.SectionExpandedOut], response_model_exclude_unset=True)
+def read_sections(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, options: list = Depends(expand_sections), db: Session = Depends(database.get_db)):
+    sections = crud.get_sections(db, skip=skip, limit=limit, cursor=cursor, sort=sort, options=options)
+    pagination.set_next_cursor(response, sections, models.Section, limit, sort)
     return sections
 
 # API route to get a section by ID
-@router.get("/sections/{section_id}", response_model=schemas.SectionOut)
-def read_section(section_id: int, db: Session = Depends(get_db)):
-    section = crud.get_section(db, section_id=section_id)
+@router.get("/sections/{section_id}", response_model=schemas.SectionExpandedOut, response_model_exclude_unset=True)
+def read_section(section_id: int, response: Response, options: list = Depends(expand_sections), db: Session = Depends(database.get_db)):
+    section = crud.get_section(db, section_id=section_id, options=options)
     if section is None:
         raise HTTPException(status_code=404, detail="Section not found")
+    versioning.set_etag(response, section)
     return section
 
 # API route to create a new section
 @router.post("/sections/", response_model=schemas.SectionOut)
-def create_section(section: schemas.SectionCreate, db: Session = Depends(get_db)):
-    return crud.create_section(db=db, section=section)
+def create_section(section: schemas.SectionCreate, response: Response, db: Session = Depends(database.get_db)):
+    db_section = crud.create_section(db=db, section=section)
+    versioning.set_etag(response, db_section)
+    return db_section
 
 # API route to update a section by ID
 @router.put("/sections/{section_id}", response_model=schemas.SectionOut)
-def update_section(section_id: int, section_update: schemas.SectionUpdate, db: Session = Depends(get_db)):
-    section = crud.update_section(db=db, section_id=section_id, section_update=section_update)
+def update_section(section_id: int, section_update: schemas.SectionUpdate, response: Response, versions: Optional[List[int]] = Depends(versioning.if_match), db: Session = Depends(database.get_db)):
+    section = crud.update_section(db=db, section_id=section_id, section_update=section_update, versions=versions)
     if section is None:
         raise HTTPException(status_code=404, detail="Section not found")
+    versioning.set_etag(response, section)
+    return section
+
+# API route to partially update a section by ID
+@router.patch("/sections/{section_id}", response_model=schemas.SectionOut)
+def patch_section(section_id: int, section_patch: schemas.SectionPatch, response: Response, versions: Optional[List[int]] = Depends(versioning.if_match), db: Session = Depends(database.get_db)):
+    section = crud.patch_section(db, section_id, section_patch.dict(exclude_unset=True), versions)
+    if section is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    versioning.set_etag(response, section)
     return section
 
 # API route to delete a section by ID
 @router.delete("/sections/{section_id}", response_model=schemas.SectionOut)
-def delete_section(section_id: int, db: Session = Depends(get_db)):
+def delete_section(section_id: int, db: Session = Depends(database.get_db)):
     section = crud.delete_section(db=db, section_id=section_id)
     if section is None:
         raise HTTPException(status_code=404, detail="Section not found")
     return section
+
+# API route to submit grades for a whole section in one transaction
+@router.post("/sections/{section_id}/grades:bulk", response_model=schemas.SectionGradesOut)
+def submit_section_grades(section_id: int, entries: List[schemas.SectionGradeEntry], db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
+    results = crud.submit_section_grades(db, section_id=section_id, entries=entries)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    counts = {"inserted": 0, "updated": 0, "rejected": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {"section_id": section_id, **counts, "results": results}
+
+# Roster rows come from one joined statement on a server-side cursor and are
+# written out as they arrive, so large sections don't build up in memory
+def _stream_roster(stmt, format: str, batch_size: int):
+    if format not in streaming.ENCODERS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(streaming.ENCODERS)}")
+    return StreamingResponse(
+        streaming.stream_rows(database.read_engine(), stmt, rosters.COLUMNS, format, batch_size),
+        media_type=streaming.MEDIA_TYPES[format],
+    )
+
+# API route to get a section's roster: enrolled students with their
+# department and current grade
+@router.get("/sections/{section_id}/roster")
+def read_section_roster(section_id: int, format: str = "json", batch_size: int = Query(streaming.DEFAULT_BATCH_SIZE, ge=1, le=10000), db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
+    if crud.get_section(db, section_id=section_id) is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    return _stream_roster(rosters.section_roster(section_id), format, batch_size)
+
+# API route to get the rosters of all of a professor's sections in one term
+@router.get("/professors/{professor_id}/rosters")
+def read_professor_rosters(professor_id: int, year: int, semester: str, format: str = "json", batch_size: int = Query(streaming.DEFAULT_BATCH_SIZE, ge=1, le=10000), db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
+    if crud.get_professor(db, professor_id=professor_id) is None:
+        raise HTTPException(status_code=404, detail="Professor not found")
+    return _stream_roster(rosters.professor_rosters(professor_id, year, semester), format, batch_size)
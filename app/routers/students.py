@@ -1,57 +1,97 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
-from app.db import crud, models, database, schemas
+from app.db import crud, dashboard, models, database, schemas
+from app.utils import expand, pagination, versioning
 from app.utils.auth import get_current_user
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
+router = APIRouter(route_class=SessionRoute)
 
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ?expand= accepts department and sections
+expand_students = expand.expansions(models.Student, schemas.StudentExpandedOut)
 
 # API route to get all students
-@router.get("/students/", response_model=List[schemas.StudentOut])
-def read_students(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    students = crud.get_students(db, skip=skip, limit=limit)
+@router.get("/students/", response_model=List[schemas.StudentExpandedOut], response_model_exclude_unset=True)
+def read_students(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, options: list = Depends(expand_students), db: Session = Depends(database.get_db)):
+    students = crud.get_students(db, skip=skip, limit=limit, cursor=cursor, sort=sort, options=options)
+    pagination.set_next_cursor(response, students, models.Student, limit, sort)
     return students
 
 # API route to get a student by ID
-@router.get("/students/{student_id}", response_model=schemas.StudentOut)
-def read_student(student_id: int, db: Session = Depends(get_db)):
-    student = crud.get_student(db, student_id=student_id)
+@router.get("/students/{student_id}", response_model=schemas.StudentExpandedOut, response_model_exclude_unset=True)
+def read_student(student_id: int, response: Response, options: list = Depends(expand_students), db: Session = Depends(database.get_db)):
+    student = crud.get_student(db, student_id=student_id, options=options)
     if student is None:
         raise HTTPException(status_code=404, detail="Student not found")
+    versioning.set_etag(response, student)
     return student
 
 # API route to create a new student
 @router.post("/students/", response_model=schemas.StudentOut)
-def create_student(student: schemas.StudentCreate, db: Session = Depends(get_db)):
-    return crud.create_student(db=db, student=student)
+def create_student(student: schemas.StudentCreate, response: Response, db: Session = Depends(database.get_db)):
+    db_student = crud.create_student(db=db, student=student)
+    versioning.set_etag(response, db_student)
+    return db_student
 
 # API route to update a student by ID
 @router.put("/students/{student_id}", response_model=schemas.StudentOut)
-def update_student(student_id: int, student_update: schemas.StudentUpdate, db: Session = Depends(get_db)):
-    student = crud.update_student(db=db, student_id=student_id, student_update=student_update)
+def update_student(student_id: int, student_update: schemas.StudentUpdate, response: Response, versions: Optional[List[int]] = Depends(versioning.if_match), db: Session = Depends(database.get_db)):
+    student = crud.update_student(db=db, student_id=student_id, student_update=student_update, versions=versions)
     if student is None:
         raise HTTPException(status_code=404, detail="Student not found")
+    versioning.set_etag(response, student)
+    return student
+
+# API route to partially update a student by ID
+@router.patch("/students/{student_id}", response_model=schemas.StudentOut)
+def patch_student(student_id: int, student_patch: schemas.StudentPatch, response: Response, versions: Optional[List[int]] = Depends(versioning.if_match), db: Session = Depends(database.get_db)):
+    student = crud.patch_student(db, student_id, student_patch.dict(exclude_unset=True), versions)
+    if student is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    versioning.set_etag(response, student)
     return student
 
 # API route to delete a student by ID
 @router.delete("/students/{student_id}", response_model=schemas.StudentOut)
-def delete_student(student_id: int, db: Session = Depends(get_db)):
+def delete_student(student_id: int, db: Session = Depends(database.get_db)):
     student = crud.delete_student(db=db, student_id=student_id)
     if student is None:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
 
-@router.get("/grades/{student_id}/{semester}/{year}", response_model=List[schemas.GradeOut])
-def read_grades(student_id: int, semester: str, year: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+# API route to get a student's grades for one term, with course info
+@router.get("/grades/{student_id}/{semester}/{year}", response_model=List[schemas.GradeWithCourseOut])
+def read_grades(student_id: int, semester: str, year: int, db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
     grades = crud.get_grades_by_student_and_semester(db, student_id=student_id, semester=semester, year=year)
     if not grades:
         raise HTTPException(status_code=404, detail="Grades not found")
     return grades
+
+# API route to get what the student home page shows (profile, the term's
+# sections, outstanding borrows, latest grades and GPA) in one response
+@router.get("/students/{student_id}/dashboard", response_model=schemas.StudentDashboardOut)
+def read_dashboard(student_id: int, year: int, semester: str, latest_grades: int = Query(dashboard.LATEST_GRADES, ge=0, le=50), db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
+    payload = dashboard.load(db, student_id, year, semester, latest_grades)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return payload
+
+# API route to get a student's transcript with per-term and cumulative GPA
+@router.get("/students/{student_id}/transcript", response_model=schemas.TranscriptOut)
+def read_transcript(student_id: int, db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
+    return transcript_out(student_id, crud.get_term_gpas(db, student_id=student_id))
+
+# Per-term rows plus cumulative totals; shared with the async router
+def transcript_out(student_id: int, terms):
+    if not terms:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    credits_attempted = sum(term.credits_attempted for term in terms)
+    grade_points = sum(term.grade_points for term in terms)
+    return {
+        "student_id": student_id,
+        "credits_attempted": credits_attempted,
+        "grade_points": grade_points,
+        "gpa": round(grade_points / credits_attempted, 2) if credits_attempted else None,
+        "terms": terms,
+    }
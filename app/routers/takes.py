@@ -1,27 +1,22 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
 from app.db import crud, models, database, schemas
+from app.utils import pagination
+from app.utils.routing import SessionRoute
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=SessionRoute)
 
 # API route to get all takes
 @router.get("/takes/", response_model=List[schemas.TakesOut])
-def read_takes(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    takes = crud.get_takes(db, skip=skip, limit=limit)
+def read_takes(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(database.get_db)):
+    takes = crud.get_takes(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    pagination.set_next_cursor(response, takes, models.Takes, limit, sort)
     return takes
 
 # API route to get a take by ID
 @router.get("/takes/{take_id}", response_model=schemas.TakesOut)
-def read_take(take_id: int, db: Session = Depends(get_db)):
+def read_take(take_id: int, db: Session = Depends(database.get_db)):
     take = crud.get_take(db, take_id=take_id)
     if take is None:
         raise HTTPException(status_code=404, detail="Take not found")
@@ -29,20 +24,28 @@ def read_take(take_id: int, db: Session = Depends(get_db)):
 
 # API route to create a new take
 @router.post("/takes/", response_model=schemas.TakesOut)
-def create_take(take: schemas.TakesCreate, db: Session = Depends(get_db)):
+def create_take(take: schemas.TakesCreate, db: Session = Depends(database.get_db)):
     return crud.create_take(db=db, take=take)
 
 # API route to update a take by ID
 @router.put("/takes/{take_id}", response_model=schemas.TakesOut)
-def update_take(take_id: int, take_update: schemas.TakesUpdate, db: Session = Depends(get_db)):
+def update_take(take_id: int, take_update: schemas.TakesUpdate, db: Session = Depends(database.get_db)):
     take = crud.update_take(db=db, take_id=take_id, take_update=take_update)
     if take is None:
         raise HTTPException(status_code=404, detail="Take not found")
     return take
 
+# API route to partially update a take by ID
+@router.patch("/takes/{take_id}", response_model=schemas.TakesOut)
+def patch_take(take_id: int, take_patch: schemas.TakesPatch, db: Session = Depends(database.get_db)):
+    take = crud.patch_take(db, take_id, take_patch.dict(exclude_unset=True))
+    if take is None:
+        raise HTTPException(status_code=404, detail="Take not found")
+    return take
+
 # API route to delete a take by ID
 @router.delete("/takes/{take_id}", response_model=schemas.TakesOut)
-def delete_take(take_id: int, db: Session = Depends(get_db)):
+def delete_take(take_id: int, db: Session = Depends(database.get_db)):
     take = crud.delete_take(db=db, take_id=take_id)
     if take is None:
         raise HTTPException(status_code=404, detail="Take not found")
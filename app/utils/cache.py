@@ -0,0 +1,350 @@
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from sqlalchemy import inspect, Date, DateTime
+from app.db import database, models
+from config import get_settings
+
+# Read-through cache for reference data (colleges, depts, rooms, courses and
+# the available course lists): tables that change a few times a term but are
+# read on every page. Entries are bounded in number (least recently used go
+# first) and in age (ttl seconds), and every table has a generation that is
+# part of each key. The CRUD writes bump it after committing, so later reads
+# miss and reload. A read that started before the bump stores its result
+# under the old generation, where nothing will look for it again; it can't
+# bring back stale data. The TTL bounds how long writes made outside the
+# CRUD functions (manual SQL, another host) stay invisible.
+#
+# Entries and generations live in a store. MemoryStore keeps them in the
+# worker process; SQLiteStore keeps them in a local file that every worker
+# on the host shares, so each entry is stored once per machine and a write
+# in one worker invalidates the entry for all of them. Rows with credential
+# columns (colleges' API keys) never go to the file.
+
+# Entries of this worker process only
+class MemoryStore:
+    name = "memory"
+
+    def __init__(self, maxsize: int, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.evictions = 0
+        self._entries = OrderedDict()  # key: (expires at, value)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def generation(self, table: str):
+        with self._lock:
+            return self._generations.get(table, 0)
+
+    def get(self, key):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= now:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables):
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.evictions = 0
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+# Cached values are rows of mapped classes: one row, a list of rows, or None.
+# The shared store keeps their column values as JSON (nothing is pickled) and
+# builds new session-free objects from them on every hit.
+def _mapped_classes():
+    from app.db.base import Base
+
+    return {mapper.local_table.name: mapper.class_ for mapper in Base.registry.mappers}
+
+# Tables whose rows carry credentials
+def _private_tables(classes):
+    return {table for table, cls in classes.items() if models.PRIVATE_ATTRIBUTES & set(inspect(cls).column_attrs.keys())}
+
+def _encode(value):
+    rows = value if isinstance(value, list) else [] if value is None else [value]
+    table = inspect(rows[0]).mapper.local_table.name if rows else None
+    return json.dumps({
+        "table": table,
+        "many": isinstance(value, list),
+        "rows": [
+            {attr.key: getattr(row, attr.key) for attr in inspect(row).mapper.column_attrs}
+            for row in rows
+        ],
+    }, default=lambda v: v.isoformat())
+
+def _decode_column(column, value):
+    if value is not None and isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if value is not None and isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    return value
+
+def _decode(text, classes):
+    payload = json.loads(text)
+    rows = []
+    if payload["rows"]:
+        cls = classes[payload["table"]]
+        attrs = inspect(cls).column_attrs
+        rows = [cls(**{attr.key: _decode_column(attr.columns[0], row[attr.key]) for attr in attrs}) for row in payload["rows"]]
+    if payload["many"]:
+        return rows
+    return rows[0] if rows else None
+
+# Whoever can write the side-store can put rows in front of every worker,
+# so it must belong to the user running them
+def _check_owner(path, st):
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        raise ValueError(f"Reference cache path '{path}' belongs to another user")
+
+# Create the side-store readable and writable by this user only, or check an
+# existing one (SQLite gives its -wal and -shm files the same permissions)
+def open_private_file(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        _check_owner(path, os.fstat(fd))
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, 0o600)
+    finally:
+        os.close(fd)
+    for sidecar in (path + "-wal", path + "-shm"):
+        if os.path.lexists(sidecar):
+            _check_owner(sidecar, os.lstat(sidecar))
+
+# Entries shared by every worker process on the host, in a local SQLite file
+# (WAL, so readers never wait for each other). Generations live in the same
+# file, which is how an invalidation in one worker reaches all the others:
+# their next lookup reads the new generation. A hit refreshes the entry's
+# recency at most every touch_interval seconds, so hits stay reads. Entries
+# of tables with credentials are kept in the worker instead; their keys
+# still hold the shared generation, so invalidations reach them too.
+class SQLiteStore:
+    name = "sqlite"
+
+    def __init__(self, path: str, maxsize: int, clock=time.time, touch_interval: float = 1.0):
+        self.path = path
+        self.maxsize = maxsize
+        self.clock = clock
+        self.touch_interval = touch_interval
+        self._evictions = 0
+        self._local = threading.local()
+        self._classes = _mapped_classes()
+        self._private_tables = _private_tables(self._classes)
+        self._private = MemoryStore(maxsize, clock=clock)
+        open_private_file(path)
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, table_name TEXT NOT NULL, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entry_table_name ON cache_entry (table_name)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entry_used ON cache_entry (used)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_generation (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    # One connection per thread, in autocommit mode
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # a cache can lose writes on power loss
+            self._local.conn = conn
+        return conn
+
+    def generation(self, table: str):
+        row = self._connection().execute("SELECT value FROM cache_generation WHERE name = ?", (table,)).fetchone()
+        return row[0] if row else 0
+
+    @property
+    def evictions(self):
+        return self._evictions + self._private.evictions
+
+    def get(self, key):
+        if key[0] in self._private_tables:
+            return self._private.get(key)
+        conn = self._connection()
+        text_key = json.dumps(key)
+        row = conn.execute("SELECT value, expires, used FROM cache_entry WHERE key = ?", (text_key,)).fetchone()
+        if row is None:
+            return False, None
+        value, expires, used = row
+        now = self.clock()
+        if expires <= now:
+            conn.execute("DELETE FROM cache_entry WHERE key = ? AND expires <= ?", (text_key, now))
+            return False, None
+        if now - used > self.touch_interval:
+            conn.execute("UPDATE cache_entry SET used = ? WHERE key = ?", (now, text_key))
+        return True, _decode(value, self._classes)
+
+    def set(self, key, value, ttl: float):
+        if key[0] in self._private_tables:
+            self._private.set(key, value, ttl)
+            return
+        conn = self._connection()
+        now = self.clock()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entry (key, table_name, value, expires, used) VALUES (?, ?, ?, ?, ?)",
+            (json.dumps(key), key[0], _encode(value), now + ttl, now),
+        )
+        excess = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0] - self.maxsize
+        if excess > 0:
+            conn.execute("DELETE FROM cache_entry WHERE key IN (SELECT key FROM cache_entry ORDER BY used LIMIT ?)", (excess,))
+            self._evictions += excess
+
+    # Entries of the old generations can never be read again; drop them too
+    def invalidate(self, tables):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO cache_generation (name, value) VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1",
+                [(table,) for table in tables],
+            )
+            conn.executemany("DELETE FROM cache_entry WHERE table_name = ?", [(table,) for table in tables])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM cache_entry")
+        conn.execute("DELETE FROM cache_generation")
+        self._private.clear()
+        self._evictions = 0
+
+    def size(self):
+        return self._connection().execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0] + self._private.size()
+
+class ReferenceCache:
+    def __init__(self, store, ttl: float):
+        self.store = store
+        self.ttl = ttl
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.store.maxsize > 0 and self.ttl > 0
+
+    def _lookup(self, key):
+        hit, value = self.store.get(key)
+        with self._lock:
+            counters = self._counters.setdefault(key[0], {"hits": 0, "misses": 0})
+            counters["hits" if hit else "misses"] += 1
+        return hit, value
+
+    # The cached result of load() for this model and arguments; on a miss,
+    # load() runs and its result is stored. The result may be shared between
+    # requests, so load() must return rows that belong to no session. Rows
+    # read from a replica may predate a write, and are not stored: a client
+    # that then reads from the primary must not be served them.
+    def read_through(self, model, args, load):
+        if not self.enabled:
+            return load()
+        table = model.__tablename__
+        key = (table, self.store.generation(table), *args)
+        hit, value = self._lookup(key)
+        if not hit:
+            value = load()
+            if not database.reading_replica():
+                self.store.set(key, value, self.ttl)
+        return value
+
+    async def read_through_async(self, model, args, load):
+        if not self.enabled:
+            return await load()
+        table = model.__tablename__
+        key = (table, self.store.generation(table), *args)
+        hit, value = self._lookup(key)
+        if not hit:
+            value = await load()
+            if not database.reading_replica():
+                self.store.set(key, value, self.ttl)
+        return value
+
+    # Call after committing a write to model's table. Tables whose foreign
+    # keys to it have an ON DELETE action change with it and are dropped too.
+    def invalidate(self, model):
+        tables = {model.__tablename__}
+        for table in model.metadata.tables.values():
+            if any(fk.ondelete and fk.column.table is model.__table__ for fk in table.foreign_keys):
+                tables.add(table.name)
+        self.store.invalidate(sorted(tables))
+
+    def clear(self):
+        self.store.clear()
+        with self._lock:
+            self._counters.clear()
+
+    # Hit and miss counters are per worker; size and entries are the store's
+    def stats(self):
+        with self._lock:
+            tables = {table: dict(counters) for table, counters in self._counters.items()}
+        return {
+            "backend": self.store.name,
+            "enabled": self.enabled,
+            "size": self.store.size(),
+            "maxsize": self.store.maxsize,
+            "ttl": self.ttl,
+            "hits": sum(counters["hits"] for counters in tables.values()),
+            "misses": sum(counters["misses"] for counters in tables.values()),
+            "evictions": self.store.evictions,
+            "tables": tables,
+        }
+
+# Default side-store file: one per database, so the workers of one deployment
+# share it and other deployments don't, in a directory of the temp directory
+# that only this user can enter (created on first use)
+def default_store_path(database_url: str):
+    owner = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    directory = os.path.join(tempfile.gettempdir(), f"school-web-{owner}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise ValueError(f"Reference cache directory '{directory}' is not a directory")
+    _check_owner(directory, st)
+    if st.st_mode & 0o077:
+        os.chmod(directory, 0o700)
+    digest = hashlib.sha1(database_url.encode()).hexdigest()[:12]
+    return os.path.join(directory, f"cache-{digest}.db")
+
+def _from_settings():
+    settings = get_settings()
+    if settings.reference_cache_backend == "memory":
+        store = MemoryStore(maxsize=settings.reference_cache_size)
+    elif settings.reference_cache_backend == "sqlite":
+        path = settings.reference_cache_path or default_store_path(settings.database_url)
+        store = SQLiteStore(path, maxsize=settings.reference_cache_size)
+    else:
+        raise ValueError(f"Unknown reference cache backend '{settings.reference_cache_backend}'")
+    return ReferenceCache(store, ttl=settings.reference_cache_ttl)
+
+reference_cache = _from_settings()
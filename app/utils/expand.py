@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+# ?expand=course,professor embeds related rows in the response. Each name is
+# a relationship that the route's expanded schema declares as a field; it is
+# loaded together with the page so serializing it never lazy-loads per row.
+# Many-to-one relationships are joined into the same SELECT, collections are
+# fetched with one extra SELECT ... WHERE key IN (...) for the whole page.
+
+def expandable(model, schema):
+    relationships = inspect(model).relationships
+    return [name for name in schema.__fields__ if name in relationships]
+
+def loader_options(model, expand: Optional[str], allowed):
+    options = []
+    for name in dict.fromkeys(filter(None, (part.strip() for part in (expand or "").split(",")))):
+        if name not in allowed:
+            raise HTTPException(status_code=400, detail=f"Cannot expand '{name}'; expected one of: {', '.join(allowed)}")
+        attr = getattr(model, name)
+        options.append(selectinload(attr) if attr.property.uselist else joinedload(attr))
+    return options
+
+# Route dependency returning the loader options for ?expand=
+def expansions(model, schema):
+    allowed = expandable(model, schema)
+
+    def dependency(expand: Optional[str] = None):
+        return loader_options(model, expand, allowed)
+    return dependency
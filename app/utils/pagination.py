@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_, false, inspect, Date, DateTime
+
+# Response header carrying the opaque cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursor(ValueError):
+    pass
+
+# Resolve `sort` ("year", "-year") into the mapped column and its direction
+def _sort_column(model, sort):
+    if not sort:
+        return None, False
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    attr = inspect(model).column_attrs.get(name)
+    if attr is None:
+        raise InvalidCursor(f"Cannot sort by '{name}'")
+    return attr.columns[0], descending
+
+# Key columns in order: the sort column first (if any), then the primary key
+def _key_columns(model, sort):
+    sort_column, descending = _sort_column(model, sort)
+    columns = list(inspect(model).primary_key)
+    if sort_column is not None:
+        columns.insert(0, sort_column)
+    return columns, descending
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    try:
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(value)
+        if isinstance(column.type, Date):
+            return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor("Malformed cursor")
+    return value
+
+def encode_cursor(values, sort=None):
+    payload = json.dumps({"k": [_encode_value(v) for v in values], "s": sort or ""}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, columns, sort=None):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["k"]
+        cursor_sort = payload["s"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_sort != (sort or ""):
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor("Malformed cursor")
+    return [_decode_value(column, value) for column, value in zip(columns, values)]
+
+# "Strictly after" / "equal" predicates for one key column. NULLs sort first
+# ascending and last descending, which is what both SQLite and MySQL do.
+def _after(column, value, descending):
+    if value is None:
+        return false() if descending else column.isnot(None)
+    if descending:
+        return or_(column < value, column.is_(None))
+    return column > value
+
+def _same(column, value):
+    return column.is_(None) if value is None else column == value
+
+# Row-value comparison (c1, c2, ...) > (v1, v2, ...) spelled out so it works
+# with mixed NULLs and on every backend
+def _keyset_filter(columns, values, descending):
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        prefix = [_same(c, v) for c, v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*prefix, _after(column, value, descending)))
+    return or_(*clauses)
+
+# Apply a page to a Query or select(). With a cursor the page starts with a
+# seek on the key columns, so page N costs the same as page 1; without one
+# the legacy skip/limit offset is used.
+def paginate(query, model, skip=0, limit=10, cursor=None, sort=None):
+    columns, descending = _key_columns(model, sort)
+    if cursor:
+        if skip:
+            raise InvalidCursor("cursor and skip cannot be combined")
+        values = decode_cursor(cursor, columns, sort)
+        query = query.where(_keyset_filter(columns, values, descending))
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+# Cursor pointing after the last row, or None when this was the last page
+def next_cursor(items, model, limit, sort=None):
+    if not items or len(items) < limit:
+        return None
+    columns, _ = _key_columns(model, sort)
+    mapper = inspect(model)
+    last = items[-1]
+    values = [getattr(last, mapper.get_property_by_column(c).key) for c in columns]
+    return encode_cursor(values, sort)
+
+def set_next_cursor(response, items, model, limit, sort=None):
+    cursor = next_cursor(items, model, limit, sort)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,208 @@
+import logging
+import queue
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from app.db import crud, database
+from app.utils.cache import default_store_path, open_private_file
+from config import get_settings
+
+logger = logging.getLogger("uvicorn")
+
+# Ticket states besides the crud registration outcomes
+QUEUED = "queued"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+# Ticket states of this worker process only. Finished tickets nobody polled
+# within the TTL are forgotten; they finish in order, so only the head of
+# the deque needs to be looked at.
+class MemoryTickets:
+    def __init__(self, ttl: float, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._tickets = {}
+        self._finished = deque()
+        self._lock = threading.Lock()
+
+    def add(self, ticket_id: str):
+        with self._lock:
+            self._tickets[ticket_id] = QUEUED
+
+    def discard(self, ticket_id: str):
+        with self._lock:
+            self._tickets.pop(ticket_id, None)
+
+    def get(self, ticket_id: str):
+        with self._lock:
+            return self._tickets.get(ticket_id)
+
+    # outcomes: [(ticket id, state)]
+    def finish(self, outcomes):
+        now = self.clock()
+        with self._lock:
+            for ticket_id, state in outcomes:
+                self._tickets[ticket_id] = state
+                self._finished.append((now, ticket_id))
+            cutoff = now - self.ttl
+            while self._finished and self._finished[0][0] < cutoff:
+                _, ticket_id = self._finished.popleft()
+                self._tickets.pop(ticket_id, None)
+
+# Ticket states shared by every worker process on the host, in the reference
+# cache's side-store file, so a poll answered by another worker than the one
+# that queued the ticket still finds it. Tickets expire ttl seconds after
+# they finish, or after they were queued if their worker never finished them.
+class SQLiteTickets:
+    def __init__(self, path: str, ttl: float, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._local = threading.local()
+        open_private_file(path)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS registration_ticket (id TEXT PRIMARY KEY, state TEXT NOT NULL, created REAL NOT NULL, finished REAL)"
+        )
+
+    # One connection per thread, in autocommit mode
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # losing a ticket on power loss is acceptable
+            self._local.conn = conn
+        return conn
+
+    def add(self, ticket_id: str):
+        self._connection().execute("INSERT INTO registration_ticket (id, state, created) VALUES (?, ?, ?)", (ticket_id, QUEUED, self.clock()))
+
+    def discard(self, ticket_id: str):
+        self._connection().execute("DELETE FROM registration_ticket WHERE id = ?", (ticket_id,))
+
+    def get(self, ticket_id: str):
+        row = self._connection().execute("SELECT state FROM registration_ticket WHERE id = ?", (ticket_id,)).fetchone()
+        return row[0] if row else None
+
+    def finish(self, outcomes):
+        conn = self._connection()
+        now = self.clock()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE registration_ticket SET state = ?, finished = ? WHERE id = ?", [(state, now, ticket_id) for ticket_id, state in outcomes])
+            conn.execute("DELETE FROM registration_ticket WHERE COALESCE(finished, created) < ?", (now - self.ttl,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+# Bounded admission queue for course registration. Requests are accepted in
+# O(1) and a single worker thread drains them in batched transactions, so
+# a registration spike turns into a steady stream of DB work instead of
+# exhausting the threadpool and the connection pool. The queue and its
+# worker live in one process; ticket states live in `tickets`, which is
+# shared between the workers on the host with SQLiteTickets.
+class RegistrationQueue:
+    def __init__(self, session_factory, maxsize, batch_size, fairness="fifo", lottery_window=0.0, tickets=None):
+        if fairness not in ("fifo", "lottery"):
+            raise ValueError(f"Unknown registration fairness '{fairness}'")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.fairness = fairness
+        self.lottery_window = lottery_window
+        self.tickets = tickets if tickets is not None else MemoryTickets(ttl=900)
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._worker = None
+
+    # Returns a ticket id, or None when the queue is full
+    def submit(self, student_id: int, section_id: int, waitlist: bool = False):
+        self._start()
+        ticket_id = uuid.uuid4().hex
+        self.tickets.add(ticket_id)
+        try:
+            self._queue.put_nowait((ticket_id, (student_id, section_id, waitlist)))
+        except queue.Full:
+            self.tickets.discard(ticket_id)
+            return None
+        return ticket_id
+
+    def status(self, ticket_id: str):
+        return self.tickets.get(ticket_id)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="registration-queue", daemon=True)
+                self._worker.start()
+
+    # FIFO takes what is waiting, up to one batch. Lottery collects everything
+    # that arrives within the window and shuffles it, so clients racing to be
+    # first within the window gain nothing.
+    def _collect(self):
+        items = [self._queue.get()]
+        if self.fairness == "lottery":
+            deadline = time.monotonic() + self.lottery_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            random.shuffle(items)
+        else:
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            for start in range(0, len(items), self.batch_size):
+                self._process(items[start:start + self.batch_size])
+
+    def _process(self, batch):
+        db = self.session_factory()
+        try:
+            outcomes = crud.register_course_selections(db, [registration for _, registration in batch])
+        except Exception:
+            logger.exception("Registration batch failed")
+            db.rollback()
+            outcomes = [ERROR] * len(batch)
+        finally:
+            db.close()
+        try:
+            self.tickets.finish([(ticket_id, outcome or NOT_FOUND) for (ticket_id, _), outcome in zip(batch, outcomes)])
+        except Exception:
+            logger.exception("Recording registration outcomes failed")
+
+def _from_settings():
+    settings = get_settings()
+    if settings.registration_ticket_store == "memory":
+        tickets = MemoryTickets(ttl=settings.registration_ticket_ttl)
+    elif settings.registration_ticket_store == "sqlite":
+        path = settings.reference_cache_path or default_store_path(settings.database_url)
+        tickets = SQLiteTickets(path, ttl=settings.registration_ticket_ttl)
+    else:
+        raise ValueError(f"Unknown registration ticket store '{settings.registration_ticket_store}'")
+    return RegistrationQueue(
+        database.SessionLocal,
+        maxsize=settings.registration_queue_size,
+        batch_size=settings.registration_batch_size,
+        fairness=settings.registration_fairness,
+        lottery_window=settings.registration_lottery_window,
+        tickets=tickets,
+    )
+
+registration_queue = _from_settings()
@@ -0,0 +1,37 @@
+import asyncio
+import functools
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Close the request's sessions as soon as the endpoint returns, before the
+# response model is built and the response is sent. Closing hands the
+# connection back to the pool; the returned objects keep their loaded
+# attributes, which is all the column-only response models read.
+def _release_sessions(endpoint):
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def release_after(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                for value in kwargs.values():
+                    if isinstance(value, AsyncSession):
+                        await value.close()
+                    elif isinstance(value, Session):
+                        value.close()
+    else:
+        @functools.wraps(endpoint)
+        def release_after(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                for value in kwargs.values():
+                    if isinstance(value, Session):
+                        value.close()
+    return release_after
+
+# Route class for routers whose endpoints take a DB session
+class SessionRoute(APIRoute):
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _release_sessions(endpoint), **kwargs)
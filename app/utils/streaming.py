@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+MEDIA_TYPES = {"csv": "text/csv", "json": "application/json", "ndjson": "application/x-ndjson"}
+
+# Rows fetched from the server-side cursor per round trip
+DEFAULT_BATCH_SIZE = 1000
+
+# Execute a Core statement on its own connection with a server-side cursor
+# and yield the rows one partition at a time. Only one partition is held in
+# memory and no ORM objects or identity map are involved.
+def iter_partitions(engine, stmt, batch_size: int = DEFAULT_BATCH_SIZE):
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        for partition in result.partitions():
+            yield partition
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+# Header line, then one chunk of CSV per partition. NULL becomes an empty
+# field, which the importer reads back as NULL.
+def encode_csv(columns, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for partition in partitions:
+        writer.writerows(partition)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+# One JSON object per row, one chunk per partition
+def encode_ndjson(columns, partitions):
+    for partition in partitions:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in partition
+        ).encode("utf-8")
+
+# A single JSON array of objects, one chunk per partition
+def encode_json(columns, partitions):
+    opening = b"["
+    for partition in partitions:
+        if partition:
+            yield opening + ",".join(json.dumps(dict(zip(columns, row)), default=_json_default) for row in partition).encode("utf-8")
+            opening = b","
+    yield b"[]" if opening == b"[" else b"]"
+
+ENCODERS = {"csv": encode_csv, "json": encode_json, "ndjson": encode_ndjson}
+
+# Byte chunks of a statement's rows in the given format, for a StreamingResponse
+def stream_rows(engine, stmt, columns, format: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    return ENCODERS[format](columns, iter_partitions(engine, stmt, batch_size))
@@ -0,0 +1,28 @@
+from typing import List, Optional
+from fastapi import Header
+
+# Versioned rows (sections, students, borrows) carry their version as a
+# strong ETag; clients send it back in If-Match to make an update conditional
+ETAG_HEADER = "ETag"
+
+# Raised when the row exists but no longer has any of the versions in If-Match
+class VersionConflict(Exception):
+    pass
+
+def etag(version: int):
+    return f'"{version}"'
+
+def set_etag(response, row):
+    response.headers[ETAG_HEADER] = etag(row.version)
+
+# If-Match as a list of acceptable versions. None (no header, or "*") means
+# the update is unconditional. Weak or foreign tags never match.
+def if_match(if_match: Optional[str] = Header(None)) -> Optional[List[int]]:
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
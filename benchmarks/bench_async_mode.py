@@ -0,0 +1,146 @@
+"""Sync vs async request path under high concurrency.
+
+Seeds a scratch SQLite database, then starts uvicorn once with DB_MODE=sync
+and once with DB_MODE=async and drives both with the same mix of catalog,
+student and transcript reads from many concurrent clients.
+
+    python benchmarks/bench_async_mode.py --concurrency 200 --duration 10
+
+Run it from a directory where app/frontend/public exists (main.py mounts it).
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def seed(students, sections):
+    from sqlalchemy import insert
+    from app.db import database, init_db, models
+
+    init_db()
+    db = database.SessionLocal()
+    try:
+        db.execute(insert(models.Dept), [{"code": 1, "name": "D1"}])
+        db.execute(insert(models.Room), [{"code": 1, "capacity": 1000}])
+        db.execute(insert(models.Professor), [{"id": 1, "first_name": "P", "last_name": "Q", "phone": "0", "department_id": 1}])
+        db.execute(insert(models.Course), [
+            {"code": c, "name": f"C{c}", "level": "1", "description": "-", "dept_code": 1, "credit": 3} for c in range(50)
+        ])
+        db.execute(insert(models.Section), [
+            {"id": s, "year": 2024, "semester": "fall", "room_code": 1, "course_code": s % 50, "professor_id": 1} for s in range(sections)
+        ])
+        db.execute(insert(models.Student), [
+            {"id": s, "first_name": "F", "last_name": "L", "phone": "0", "address": "-", "dept_code": 1} for s in range(students)
+        ])
+        db.execute(insert(models.TermGpa), [
+            {"student_id": s, "year": 2024, "semester": "fall", "credits_attempted": 12, "grade_points": 40} for s in range(students)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def request_mix(students):
+    choice = random.random()
+    if choice < 0.4:
+        return f"/students/{random.randrange(students)}"
+    if choice < 0.7:
+        return f"/students/{random.randrange(students)}/transcript"
+    return "/available_courses/?semester=fall&year=2024&limit=20"
+
+
+async def drive(base_url, concurrency, duration, students):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(http):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await http.get(request_mix(students))
+            except httpx.TimeoutException:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=10) as http:
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+    latencies.sort()
+    return latencies, errors
+
+
+def wait_until_up(base_url, process):
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            httpx.get(base_url + "/courses/?limit=1")
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError("uvicorn did not start")
+
+
+def bench_mode(mode, env, port, args):
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", ROOT, "--port", str(port), "--log-level", "warning"],
+        env=dict(env, DB_MODE=mode),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(base_url, process)
+        latencies, errors = asyncio.run(drive(base_url, args.concurrency, args.duration, args.students))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    n = len(latencies)
+    if not n:
+        print(f"{mode:>5}: no request completed, {errors} errors")
+        return
+    print(f"{mode:>5}: {n / args.duration:,.0f} req/s, p50 {latencies[n // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(n * 0.99)] * 1000:.1f} ms, {errors} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--sections", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", default="sync,async", help="Comma-separated DB_MODE values to run")
+    args = parser.parse_args()
+
+    # Point the app at a scratch database before anything imports it
+    scratch = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    seed(args.students, args.sections)
+    env = dict(os.environ)
+    print(f"{args.concurrency} concurrent clients, {args.duration:.0f}s per mode")
+    for mode in args.modes.split(","):
+        bench_mode(mode, env, args.port, args)
+
+
+if __name__ == "__main__":
+    main()
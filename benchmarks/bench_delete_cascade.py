@@ -0,0 +1,93 @@
+"""Deleting a room with many sections: ORM-loaded cascade vs ON DELETE CASCADE.
+
+Seeds a room with years of sections, each with a roster and grades, in a
+scratch SQLite database. The "orm" path loads the room's sections into the
+session and lets the ORM delete them one by one, as delete_room used to;
+the "db" path is crud.delete_room, a single DELETE whose dependent rows go
+through the foreign keys' ON DELETE CASCADE.
+
+    python benchmarks/bench_delete_cascade.py --sections 2000 --students 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(engine, sections, students):
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+    from app.db import crud, models
+
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(models.Dept), [{"code": 1, "name": "D1"}])
+        db.execute(insert(models.Course), [{"code": 1, "name": "C", "dept_code": 1, "credit": 3}])
+        db.execute(insert(models.Room), [{"code": 1, "location": "R", "capacity": students}])
+        db.execute(insert(models.Student), [{"id": s, "first_name": "F", "last_name": "L", "dept_code": 1} for s in range(students)])
+        db.execute(insert(models.Section), [
+            {"id": s, "year": 2000 + s // 100, "semester": "fall", "room_code": 1, "course_code": 1, "seats_taken": students}
+            for s in range(sections)
+        ])
+        db.execute(insert(models.StudentSection), [{"student_id": st, "section_id": s} for s in range(sections) for st in range(students)])
+        db.execute(insert(models.Grade), [{"student_id": st, "section_id": s, "grade": 15} for s in range(sections) for st in range(students)])
+        db.commit()
+        crud.rebuild_term_gpas(db)
+
+
+def delete_orm(db):
+    from app.db import models
+
+    room = db.get(models.Room, 1)
+    room.sections  # loading the collection makes the ORM delete each section
+    db.delete(room)
+    db.commit()
+
+
+def delete_db(db):
+    from app.db import crud
+
+    crud.delete_room(db, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=2000, help="Sections in the room")
+    parser.add_argument("--students", type=int, default=20, help="Enrolled and graded students per section")
+    args = parser.parse_args()
+
+    # Point the app at a scratch database before anything imports it
+    scratch = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    from sqlalchemy import event
+    from app.db import database
+
+    counter = {"n": 0}
+
+    def count(*args):
+        counter["n"] += 1
+
+    event.listen(database.engine, "before_cursor_execute", count)
+    for name, delete in (("orm", delete_orm), ("db", delete_db)):
+        seed(database.engine, args.sections, args.students)
+        db = database.SessionLocal()
+        try:
+            counter["n"] = 0
+            tracemalloc.start()
+            start = time.perf_counter()
+            delete(db)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        finally:
+            db.close()
+        print(f"{name:>4}: {elapsed * 1000:8.1f} ms, {counter['n']:6d} statements, peak {peak / 2**20:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
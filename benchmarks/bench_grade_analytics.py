@@ -0,0 +1,81 @@
+"""Throughput of the vectorized grade analytics.
+
+Times app.db.analytics.grade_statistics on synthetic in-memory arrays, then
+the full path (Core select from a scratch SQLite database + statistics).
+
+    python benchmarks/bench_grade_analytics.py --rows 5000000 --db-rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def bench_compute(rows, groups, bins):
+    from app.db import analytics
+
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, groups, rows)
+    grades = rng.integers(0, 21, rows)
+    start = time.perf_counter()
+    stats = analytics.grade_statistics(keys, grades, bins=bins)
+    elapsed = time.perf_counter() - start
+    print(f"compute: {rows:,} grades, {len(stats['groups']):,} groups in {elapsed:.3f}s "
+          f"({rows / elapsed:,.0f} rows/s)")
+
+
+def bench_database(rows, sections, bins):
+    from sqlalchemy import insert
+    from app.db import analytics, database, init_db, models
+
+    init_db()
+    rng = np.random.default_rng(1)
+    db = database.SessionLocal()
+    try:
+        db.execute(insert(models.Dept), [{"code": d, "name": f"D{d}"} for d in range(20)])
+        db.execute(insert(models.Course), [{"code": c, "name": f"C{c}", "dept_code": c % 20, "credit": 3} for c in range(200)])
+        db.execute(insert(models.Student), [{"id": 1, "first_name": "F", "last_name": "L", "dept_code": 0}])
+        db.execute(insert(models.Section), [{"id": s, "year": 2024, "semester": "fall", "course_code": s % 200} for s in range(sections)])
+        chunk = 200_000
+        for offset in range(0, rows, chunk):
+            n = min(chunk, rows - offset)
+            section_ids = rng.integers(0, sections, n)
+            grades = rng.integers(0, 21, n)
+            db.execute(insert(models.Grade), [{"section_id": int(s), "student_id": 1, "grade": int(g)} for s, g in zip(section_ids, grades)])
+        db.commit()
+
+        for group in analytics.GradeGroup:
+            start = time.perf_counter()
+            keys, grades = analytics.load_grades(db, group)
+            loaded = time.perf_counter()
+            stats = analytics.grade_statistics(keys, grades, bins=bins)
+            done = time.perf_counter()
+            print(f"{group.value:>7}: load {loaded - start:.3f}s, compute {done - loaded:.3f}s, "
+                  f"{len(stats['groups']):,} groups, {rows / (done - start):,.0f} rows/s end to end")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000, help="synthetic grades for the compute benchmark")
+    parser.add_argument("--groups", type=int, default=10_000)
+    parser.add_argument("--db-rows", type=int, default=1_000_000, help="grade rows loaded into SQLite (0 to skip)")
+    parser.add_argument("--sections", type=int, default=5_000)
+    parser.add_argument("--bins", type=int, default=10)
+    args = parser.parse_args()
+
+    # Always run against a scratch database, never the configured one
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "analytics.db")
+    bench_compute(args.rows, args.groups, args.bins)
+    if args.db_rows:
+        bench_database(args.db_rows, args.sections, args.bins)
+
+
+if __name__ == "__main__":
+    main()
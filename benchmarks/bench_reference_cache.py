@@ -0,0 +1,84 @@
+"""Catalog reads without the reference data cache and with each backend.
+
+Seeds departments and courses in a scratch SQLite database, then reads
+course pages and single courses through crud.get_courses / crud.get_course
+the way GET /courses/ and GET /courses/{code} do: with the cache turned off,
+with the per-process memory store and with the SQLite side-store that
+workers share. Reports time per read and the hit rate.
+
+    python benchmarks/bench_reference_cache.py --courses 500 --reads 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(engine, courses):
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+    from app.db import models
+
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(models.Dept), [{"code": d, "name": f"D{d}", "office": d, "phone": "0"} for d in range(10)])
+        db.execute(insert(models.Course), [
+            {"code": c, "name": f"C{c}", "level": "1", "description": "-", "dept_code": c % 10, "credit": 3}
+            for c in range(courses)
+        ])
+        db.commit()
+
+
+def read(db, courses, reads, seed_value):
+    from app.db import crud
+
+    rng = random.Random(seed_value)
+    for _ in range(reads):
+        if rng.random() < 0.5:
+            crud.get_courses(db, skip=rng.randrange(0, courses, 10), limit=10)
+        else:
+            crud.get_course(db, rng.randrange(courses))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=500, help="Courses in the catalog")
+    parser.add_argument("--reads", type=int, default=20000, help="Catalog reads per run")
+    args = parser.parse_args()
+
+    # Point the app at a scratch database before anything imports it
+    scratch = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    from app.db import database
+    from app.utils.cache import MemoryStore, SQLiteStore, reference_cache
+
+    seed(database.engine, args.courses)
+    maxsize = reference_cache.store.maxsize
+    stores = (
+        ("off", MemoryStore(0)),
+        ("memory", MemoryStore(maxsize)),
+        ("sqlite", SQLiteStore(os.path.join(scratch, "cache.db"), maxsize)),
+    )
+    for name, store in stores:
+        reference_cache.store = store
+        reference_cache.clear()
+        db = database.SessionLocal()
+        try:
+            start = time.perf_counter()
+            read(db, args.courses, args.reads, seed_value=1)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+        stats = reference_cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = f"{stats['hits'] / lookups:6.1%}" if lookups else "     -"
+        print(f"{name:>6}: {elapsed / args.reads * 1e6:8.1f} us/read, hit rate {hit_rate}")
+
+
+if __name__ == "__main__":
+    main()
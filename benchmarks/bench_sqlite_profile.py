@@ -0,0 +1,117 @@
+"""SQLite read/write concurrency with and without the connection profile.
+
+Runs reader threads (primary-key lookups) next to writer threads (small
+insert transactions) against a scratch database file, once with SQLite's
+defaults (rollback journal) and once with the profile from
+app.db.database.apply_sqlite_profile (WAL, synchronous=NORMAL, mmap,
+cache_size, busy_timeout).
+
+    python benchmarks/bench_sqlite_profile.py --readers 8 --writers 2 --duration 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_engine(path, profile):
+    from sqlalchemy import create_engine
+    from app.db import database
+
+    engine = create_engine(f"sqlite:///{path}", pool_size=32, max_overflow=0)
+    if profile:
+        database.apply_sqlite_profile(engine, database.settings)
+    return engine
+
+
+def seed(engine, students):
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+    from app.db import models
+
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(models.Dept), [{"code": 1, "name": "D1"}])
+        db.execute(insert(models.Student), [
+            {"id": s, "first_name": "F", "last_name": "L", "phone": "0", "address": "-", "dept_code": 1} for s in range(students)
+        ])
+        db.commit()
+
+
+def run(engine, readers, writers, duration, students):
+    from sqlalchemy import insert, select
+    from sqlalchemy.exc import OperationalError
+    from app.db import models
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    read_latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def reader():
+        n, latencies = 0, []
+        with engine.connect() as conn:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                conn.execute(select(models.Student).where(models.Student.id == random.randrange(students))).all()
+                conn.rollback()
+                latencies.append(time.perf_counter() - start)
+                n += 1
+        with lock:
+            counts["reads"] += n
+            read_latencies.extend(latencies)
+
+    def writer():
+        n = errors = 0
+        with engine.connect() as conn:
+            while time.perf_counter() < deadline:
+                try:
+                    conn.execute(insert(models.Takes), [{"student_id": random.randrange(students), "course_code": None, "year": 2024, "semester": "fall"}] * 10)
+                    conn.commit()
+                    n += 1
+                except OperationalError:
+                    conn.rollback()
+                    errors += 1
+        with lock:
+            counts["writes"] += n
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    read_latencies.sort()
+    p99 = read_latencies[int(len(read_latencies) * 0.99)] * 1000 if read_latencies else 0.0
+    return counts, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--students", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # Point the app at a scratch database before anything imports it
+    scratch = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'app.db')}"
+    print(f"{args.readers} readers, {args.writers} writers, {args.duration:.0f}s per run")
+    for profile in (False, True):
+        engine = make_engine(os.path.join(scratch, f"bench_{int(profile)}.db"), profile)
+        seed(engine, args.students)
+        counts, p99 = run(engine, args.readers, args.writers, args.duration, args.students)
+        engine.dispose()
+        print(f"{'profile' if profile else 'default':>7}: {counts['reads'] / args.duration:,.0f} reads/s "
+              f"(p99 {p99:.1f} ms), {counts['writes'] / args.duration:,.0f} write txns/s, "
+              f"{counts['errors']} busy errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Round trips and latency of the crud create/update path for every entity.
+
+Creates and then updates rows of each entity through app.db.crud against a
+scratch SQLite database and counts the statements sent per write (COMMIT
+included). It runs once with INSERT/UPDATE ... RETURNING and once with the
+dialect's RETURNING support switched off, which is the path MySQL takes.
+
+    python benchmarks/bench_write_round_trips.py --writes 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# entity: (create function, schema, create payload, patch function, key attribute, patched values)
+def write_cases(schemas):
+    return {
+        "college": ("create_college", schemas.CollegeCreate, {"name": "C", "office": 1, "phone": "0", "dean": 1, "apikey": "k"}, "patch_college", "id", {"phone": "1"}),
+        "dept": ("create_dept", schemas.DeptCreate, {"name": "D", "office": 1, "phone": "0", "college_id": 1}, "patch_dept", "code", {"phone": "1"}),
+        "course": ("create_course", schemas.CourseCreate, {"name": "C", "level": "1", "description": "-", "dept_code": 1, "credit": 3}, "patch_course", "code", {"credit": 4}),
+        "room": ("create_room", schemas.RoomCreate, {"location": "R", "capacity": 30}, "patch_room", "code", {"capacity": 40}),
+        "professor": ("create_professor", schemas.ProfessorCreate, {"first_name": "P", "last_name": "Q", "phone": "0", "department_id": 1}, "patch_professor", "id", {"phone": "1"}),
+        "section": ("create_section", schemas.SectionCreate, {"year": 2024, "semester": "fall", "room_code": 1, "course_code": 1, "professor_id": 1}, "patch_section", "id", {"semester": "spring"}),
+        "student": ("create_student", schemas.StudentCreate, {"first_name": "S", "last_name": "T", "phone": "0", "address": "-", "dept_code": 1}, "patch_student", "id", {"phone": "1"}),
+        "book": ("create_book", schemas.BookCreate, {"title": "B", "author": "A", "pub_date": date(2020, 1, 1), "l_code": 1}, "patch_book", "id", {"author": "Z"}),
+        "borrow": ("create_borrow", schemas.BorrowCreate, {"book_id": 1, "student_id": 1, "date_of_borrow": date(2024, 1, 1)}, "patch_borrow", "id", {"return_time": date(2024, 2, 1)}),
+        "employee": ("create_employee", schemas.EmployeeCreate, {"first_name": "E", "last_name": "F", "position": "-", "salary": 1, "department_id": 1}, "patch_employee", "id", {"salary": 2}),
+        "educational_employee": ("create_educational_employee", schemas.EducationalEmployeeCreate, {"degree": 1, "edu_id": 1, "apikey": "k"}, "patch_educational_employee", "id", {"degree": 2}),
+        "take": ("create_take", schemas.TakesCreate, {"student_id": 1, "course_code": 1, "year": 2024, "semester": "fall"}, "patch_take", "id", {"year": 2025}),
+        "grade": ("create_grade", schemas.GradeCreate, {"student_id": 1, "section_id": 1, "grade": 15}, "patch_grade", "id", {"grade": 17}),
+    }
+
+
+def measure(counter, write):
+    counter["n"] = 0
+    start = time.perf_counter()
+    result = write()
+    return result, time.perf_counter() - start, counter["n"]
+
+
+def run(engine, writes):
+    from sqlalchemy import event
+    from app.db import crud, database, models, schemas
+
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    counter = {"n": 0}
+
+    def count(*args):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    event.listen(engine, "commit", count)
+    db = database.SessionLocal()
+    rows = []
+    try:
+        for entity, (create, schema, payload, update_fn, key, changes) in write_cases(schemas).items():
+            create_stats, update_stats = [0.0, 0], [0.0, 0]
+            for _ in range(writes):
+                row, seconds, trips = measure(counter, lambda: getattr(crud, create)(db, schema(**payload)))
+                create_stats[0] += seconds
+                create_stats[1] += trips
+                _, seconds, trips = measure(counter, lambda: getattr(crud, update_fn)(db, getattr(row, key), changes))
+                update_stats[0] += seconds
+                update_stats[1] += trips
+            rows.append((entity, create_stats, update_stats))
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", count)
+        event.remove(engine, "commit", count)
+    for entity, (create_time, create_trips), (update_time, update_trips) in rows:
+        print(f"  {entity:>20}: create {create_trips / writes:.1f} trips {create_time / writes * 1e6:7.0f} us, "
+              f"update {update_trips / writes:.1f} trips {update_time / writes * 1e6:7.0f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=500, help="Creates and updates per entity")
+    args = parser.parse_args()
+
+    # Point the app at a scratch database before anything imports it
+    scratch = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    from app.db import database
+
+    dialect = database.engine.dialect
+    print("RETURNING:")
+    run(database.engine, args.writes)
+    dialect.insert_returning = dialect.update_returning = False
+    print("fallback (MySQL path):")
+    run(database.engine, args.writes)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,40 @@ class Settings:
         self.database_password = os.getenv("DATABASE_PASSWORD", default="school_password")
         self.database_host = os.getenv("DATABASE_HOST", default="localhost")
         self.database_port = os.getenv("DATABASE_PORT", default="3306")
+        # Connection pool, per worker process. Size plus overflow defaults to the
+        # 40 threads of Starlette's threadpool; recycle stays well under MySQL's
+        # wait_timeout. GET /metrics/pool shows how much of it is in use.
+        self.db_pool_size = int(os.getenv("DB_POOL_SIZE", default="10"))
+        self.db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", default="30"))
+        self.db_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", default="30"))
+        self.db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", default="1800"))
+        self.db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", default="true").lower() in ("1", "true", "yes")
+        # SQLite profile, applied to every pooled connection: WAL lets readers
+        # run alongside a writer, NORMAL sync is durable in WAL mode except on
+        # power loss, and busy_timeout makes writers wait instead of failing
+        self.sqlite_journal_mode = os.getenv("SQLITE_JOURNAL_MODE", default="WAL")
+        self.sqlite_synchronous = os.getenv("SQLITE_SYNCHRONOUS", default="NORMAL")
+        self.sqlite_mmap_size = int(os.getenv("SQLITE_MMAP_SIZE", default=str(256 * 1024 * 1024)))
+        self.sqlite_cache_size = int(os.getenv("SQLITE_CACHE_SIZE", default="-65536"))  # negative = KiB
+        self.sqlite_busy_timeout = int(os.getenv("SQLITE_BUSY_TIMEOUT", default="5000"))  # ms
+        # Optional read replicas (comma-separated URLs). GET requests read from
+        # a replica unless the client wrote within the stickiness window.
+        self.database_replica_urls = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", default="").split(",") if url.strip()]
+        self.read_your_writes_seconds = float(os.getenv("READ_YOUR_WRITES_SECONDS", default="5"))
+        # "sync" serves every route from the threadpool; "async" serves the hot
+        # read and registration routes on an async engine. The async URL
+        # defaults to DATABASE_URL with the matching async driver.
+        self.db_mode = os.getenv("DB_MODE", default="sync")
+        self.async_database_url = os.getenv("ASYNC_DATABASE_URL", default=None)
+        # Cache of colleges, depts, rooms, courses and available course lists:
+        # entries kept at most, and seconds before one is reloaded; 0 turns it
+        # off. "memory" caches per worker process; "sqlite" shares one local
+        # file (REFERENCE_CACHE_PATH, by default one per database in the temp
+        # directory) between all workers on the host.
+        self.reference_cache_size = int(os.getenv("REFERENCE_CACHE_SIZE", default="1024"))
+        self.reference_cache_ttl = float(os.getenv("REFERENCE_CACHE_TTL", default="300"))
+        self.reference_cache_backend = os.getenv("REFERENCE_CACHE_BACKEND", default="memory")
+        self.reference_cache_path = os.getenv("REFERENCE_CACHE_PATH", default=None)
         self.mysql_root_password = os.getenv("MYSQL_ROOT_PASSWORD", default="root_password")
         self.phpmyadmin_user = os.getenv("PHPMYADMIN_USER", default="admin")
         self.phpmyadmin_password = os.getenv("PHPMYADMIN_PASSWORD", default="admin_password")
@@ -20,6 +54,18 @@ class Settings:
         self.use_ssl = os.getenv("USE_SSL", default=False)
         self.ssl_cert_path = os.getenv("SSL_CERT_PATH", default=None)
         self.ssl_key_path = os.getenv("SSL_KEY_PATH", default=None)
+        # Course registration: "direct" registers inline, "queued" admits requests
+        # into a bounded queue drained in batched transactions
+        self.registration_mode = os.getenv("REGISTRATION_MODE", default="direct")
+        self.registration_queue_size = int(os.getenv("REGISTRATION_QUEUE_SIZE", default="10000"))
+        self.registration_batch_size = int(os.getenv("REGISTRATION_BATCH_SIZE", default="100"))
+        self.registration_fairness = os.getenv("REGISTRATION_FAIRNESS", default="fifo")  # "fifo" or "lottery"
+        self.registration_lottery_window = float(os.getenv("REGISTRATION_LOTTERY_WINDOW", default="2"))
+        self.registration_ticket_ttl = int(os.getenv("REGISTRATION_TICKET_TTL", default="900"))
+        # Where ticket states live: "memory" in the worker that queued them, so
+        # polls must reach that worker; "sqlite" in the reference cache's side-
+        # store file, shared by all workers on the host
+        self.registration_ticket_store = os.getenv("REGISTRATION_TICKET_STORE", default="memory")
 
 def get_settings():
     return Settings()
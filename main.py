@@ -1,20 +1,29 @@
 import logging
+import math
+import time
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from app.db import models, database, schemas, crud
 from app.utils.auth import authenticate_user, create_access_token
+from app.utils.pagination import InvalidCursor, NEXT_CURSOR_HEADER
+from app.utils.routing import SessionRoute
+from app.utils.versioning import ETAG_HEADER, VersionConflict
+from config import get_settings
 import os
 
 # Initialize the logger
 logger = logging.getLogger("uvicorn")
 logger.setLevel(logging.INFO)
 
+settings = get_settings()
+
 app = FastAPI()
+app.router.route_class = SessionRoute
 
 # Middleware
 app.add_middleware(
@@ -23,19 +32,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
 # Serve static files
 app.mount("/static", StaticFiles(directory="app/frontend/public"), name="static")
 
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Log requests
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -44,9 +46,46 @@ async def log_requests(request: Request, call_next):
     logger.info(f"Response: {response.status_code}")
     return response
 
+# Name of the cookie holding the time until which a client reads from the
+# primary, so it sees its own writes while the replicas catch up
+PRIMARY_UNTIL_COOKIE = "db_primary_until"
+
+def primary_until(request: Request):
+    try:
+        return float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0))
+    except ValueError:
+        return 0.0
+
+# Route reads to a replica for GET requests; after a write the client sticks
+# to the primary for the read-your-writes window
+@app.middleware("http")
+async def route_reads(request: Request, call_next):
+    if not database.replica_engines:
+        return await call_next(request)
+    reading = request.method in ("GET", "HEAD")
+    token = database.use_replica.set(reading and primary_until(request) < time.time())
+    try:
+        response = await call_next(request)
+    finally:
+        database.use_replica.reset(token)
+    if not reading and request.method != "OPTIONS":
+        window = settings.read_your_writes_seconds
+        response.set_cookie(PRIMARY_UNTIL_COOKIE, str(time.time() + window), max_age=math.ceil(window), httponly=True)
+    return response
+
+# Malformed or mismatched pagination cursors are client errors
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+# A conditional update lost the race: the client must re-read and retry
+@app.exception_handler(VersionConflict)
+async def version_conflict_handler(request: Request, exc: VersionConflict):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
 # Route for obtaining a token
 @app.post("/token", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -61,7 +100,16 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Include other routers
-from app.routers import students, books, borrows, colleges, courses, depts, educational_employees
+from app.routers import students, books, borrows, colleges, courses, depts, educational_employees, sections, analytics, imports, exports, metrics
+
+# In async mode the async variants are matched first; the routes they don't
+# cover fall through to the sync routers
+if settings.db_mode == "async":
+    from app.routers import async_students, async_courses, async_sections
+
+    app.include_router(async_students.router)
+    app.include_router(async_courses.router)
+    app.include_router(async_sections.router)
 
 app.include_router(students.router)
 app.include_router(books.router)
@@ -70,6 +118,11 @@ app.include_router(colleges.router)
 app.include_router(courses.router)
 app.include_router(depts.router)
 app.include_router(educational_employees.router)
+app.include_router(sections.router)
+app.include_router(analytics.router)
+app.include_router(imports.router)
+app.include_router(exports.router)
+app.include_router(metrics.router)
 
 # Catch-all route to serve the frontend
 @app.get("/{full_path:path}")
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+from app.db import crud, database, explain, importer, query_budget
+
+# Rebuild the materialized term GPA table from the grades
+def rebuild_transcripts(args):
+    db = database.SessionLocal()
+    try:
+        rows = crud.rebuild_term_gpas(db, student_id=args.student_id)
+    finally:
+        db.close()
+    print(f"Rebuilt {rows} term GPA rows")
+
+# Stream a CSV/NDJSON file into one entity table
+def import_file(args):
+    format = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+    db = database.SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            report = importer.import_stream(db, args.entity, stream, format, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+
+# EXPLAIN the CRUD queries on a scratch database; fails on any full scan
+def explain_check(args):
+    problems = explain.check()
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(f"{len(problems)} queries or foreign keys without a usable index")
+    print(f"All {len(explain.CHECKS)} CRUD calls use indexes")
+
+# Count the statements behind each expanded list endpoint; fails over budget
+def query_budget_check(args):
+    results, problems = query_budget.check()
+    for name, statements, budget in results:
+        print(f"{name}: {statements} statements (budget {budget})")
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(f"{len(problems)} endpoints over their statement budget")
+
+def main():
+    parser = argparse.ArgumentParser(description="School Web management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-transcripts", help="Recompute term GPAs from the grades")
+    rebuild.add_argument("--student-id", type=int, help="Only rebuild this student's transcript")
+    rebuild.set_defaults(func=rebuild_transcripts)
+
+    load = commands.add_parser("import", help="Bulk import students, courses, sections or enrollments")
+    load.add_argument("entity", choices=sorted(importer.ENTITIES))
+    load.add_argument("path", help="CSV or NDJSON file")
+    load.add_argument("--format", choices=importer.FORMATS, help="Defaults to the file extension")
+    load.add_argument("--chunk-size", type=int, default=1000, help="Rows per insert batch and transaction")
+    load.set_defaults(func=import_file)
+
+    plans = commands.add_parser("explain-check", help="Fail if a CRUD query does a full table scan")
+    plans.set_defaults(func=explain_check)
+
+    budget = commands.add_parser("query-budget", help="Fail if an expanded list endpoint exceeds its statement budget")
+    budget.set_defaults(func=query_budget_check)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()